@@ -0,0 +1,71 @@
+"""CSV parse throughput of Reader's csv engines on synthetic exports.
+
+Each season file (the 2023 file is utf-8, the 2024 file latin1) is parsed with
+every csv engine the way Reader reads it (read_sales_csv, with the file's
+columns and types), and the throughput is reported in MB of csv per second.
+The pyarrow engine is skipped when pyarrow is not installed.
+
+    python benchmarks/bench_csv_engines.py --rows 1M --runs 3
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from soccer_tickets.raw_data_reader import CSV_ENGINES, Reader, read_sales_csv  # noqa: E402
+from synthetic_sales import parse_rows, write_sales  # noqa: E402
+from bench_stages import git_commit  # noqa: E402
+
+
+def parse_throughput(paths: list, runs: int = 3) -> list:
+    """Parses every file with every available engine, returning one result per file and engine
+    with the fastest of the runs."""
+    reader = Reader(paths, chunksize = 1)
+    reader._scan_sales()
+    engines = [engine for engine in CSV_ENGINES if engine != 'pyarrow' or importlib.util.find_spec('pyarrow')]
+    results = []
+    for season_file in reader.season_files:
+        megabytes = os.path.getsize(season_file.path) / 1e6
+        for engine in engines:
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                sales = read_sales_csv(season_file.path, season_file.encoding, season_file.usecols,
+                                       season_file.dtype, engine)
+                times.append(time.perf_counter() - start)
+            results.append({'file': os.path.basename(season_file.path), 'encoding': season_file.encoding,
+                            'engine': engine, 'mb': megabytes, 'rows': len(sales), 'seconds': min(times),
+                            'mb_per_s': megabytes / min(times)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--rows', default = '1M', help = 'comma separated sizes, e.g. 60k,1M,10M')
+    parser.add_argument('--runs', type = int, default = 3)
+    parser.add_argument('--data', default = os.path.join(ROOT, 'bench_data'), help = 'folder for the synthetic files')
+    parser.add_argument('--output', default = None, help = 'append results to this JSON lines file')
+    args = parser.parse_args()
+
+    for size in args.rows.split(','):
+        rows = parse_rows(size)
+        results = parse_throughput(write_sales(args.data, rows), args.runs)
+        print(f"\n{rows:,} rows")
+        print(f"{'file':<30}{'encoding':>10}{'engine':>10}{'MB':>9}{'seconds':>10}{'MB/s':>9}")
+        for result in results:
+            print(f"{result['file']:<30}{result['encoding']:>10}{result['engine']:>10}{result['mb']:>9.1f}"
+                  f"{result['seconds']:>10.3f}{result['mb_per_s']:>9.1f}")
+
+        if args.output:
+            with open(args.output, 'a') as file:
+                for result in results:
+                    file.write(json.dumps({'rows': rows, 'commit': git_commit(),
+                                           'time': time.strftime('%Y-%m-%dT%H:%M:%S'), **result}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Import time benchmark for soccer_tickets.raw_data_reader.
+
+Each run imports the module in a fresh interpreter with ``-X importtime`` and
+reports the cumulative import time of the module itself. Plotting libraries
+must not be loaded just to build a Reader, so the run fails if matplotlib or
+seaborn show up in the import tree.
+
+    python benchmarks/bench_import.py --runs 10 --max-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE = 'soccer_tickets.raw_data_reader'
+HEAVY_MODULES = ('matplotlib', 'seaborn')
+
+
+def import_profile(module: str = MODULE) -> dict:
+    """Imports the module in a new interpreter and returns the cumulative import
+    time (microseconds) of every module that was loaded along the way."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd = ROOT, capture_output = True, text = True, check = True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--runs', type = int, default = 5)
+    parser.add_argument('--max-ms', type = float, default = None,
+                        help = 'fail if the median import time is above this')
+    args = parser.parse_args()
+
+    times = []
+    for _ in range(args.runs):
+        profile = import_profile()
+        heavy = sorted(name for name in profile if name.split('.')[0] in HEAVY_MODULES)
+        if heavy:
+            sys.exit(f"{MODULE} imports plotting libraries at startup: {', '.join(heavy)}")
+        times.append(profile[MODULE] / 1000)
+
+    median = statistics.median(times)
+    print(f"{MODULE}: median {median:.1f} ms, min {min(times):.1f} ms over {args.runs} runs")
+    if args.max_ms is not None and median > args.max_ms:
+        sys.exit(f"import time {median:.1f} ms is above the {args.max_ms:.1f} ms limit")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Peak memory of Reader ingest compared to the size of the loaded sales.
+
+Each run loads synthetic season files (see synthetic_sales.py) with Reader in
+a fresh interpreter and measures the memory held once total_sales is loaded
+(the final frame) and the peak memory while loading. Python objects and numpy
+arrays are traced with tracemalloc, and arrow-backed columns through pyarrow's
+memory pool when pandas uses it. The two peaks are added together, which is an
+upper bound. The run fails if the peak is more than --max-ratio times the
+final frame.
+
+Only the main process is measured. With --workers 2 or more (the default with
+several files on a multi-core machine is a process pool), each worker process
+also holds the season it cleans while it is loading, which is not counted.
+
+    python benchmarks/bench_memory.py --rows 60k,1M --max-ratio 2 --workers 1,2
+
+tests/test_ingest_memory.py runs the same measurement on a small export.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(paths: list, workers: int = 1) -> dict:
+    """Loads the sales files with Reader and returns the bytes held by the loaded reader and the
+    peak bytes while loading, in this process only."""
+    sys.path.insert(0, ROOT)
+    from soccer_tickets.raw_data_reader import Reader
+    try:
+        import pyarrow
+        pool = pyarrow.default_memory_pool()
+    except ImportError:
+        pool = None
+
+    gc.collect()
+    arrow_before = pool.bytes_allocated() if pool else 0
+    tracemalloc.start()
+    reader = Reader(paths, workers = workers)
+    gc.collect()
+    traced, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow = pool.bytes_allocated() - arrow_before if pool else 0
+    arrow_peak = pool.max_memory() - arrow_before if pool else 0
+    return {'rows': len(reader.total_sales), 'final_bytes': traced + arrow, 'peak_bytes': traced_peak + arrow_peak}
+
+
+def measure_ingest(paths: list, workers: int = 1) -> dict:
+    """Runs measure in a fresh interpreter, so pyarrow's peak is only this ingest, and returns
+    its result with the ratio of the peak to the final frame added."""
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--workers', str(workers),
+                             '--measure', *paths],
+                            capture_output = True, text = True, check = True)
+    result = json.loads(result.stdout.strip().splitlines()[-1])
+    result['ratio'] = result['peak_bytes'] / result['final_bytes']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--rows', default = '60k', help = 'comma separated sizes, e.g. 60k,1M')
+    parser.add_argument('--data', default = os.path.join(ROOT, 'bench_data'), help = 'folder for the synthetic files')
+    parser.add_argument('--max-ratio', type = float, default = 2.0,
+                        help = 'fail if the peak is more than this many times the final frame')
+    parser.add_argument('--workers', default = '1', help = 'comma separated Reader worker counts, e.g. 1,2')
+    parser.add_argument('--measure', nargs = '+', default = None, help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        # child process started by measure_ingest
+        print(json.dumps(measure(args.measure, int(args.workers))))
+        return
+
+    from synthetic_sales import parse_rows, write_sales
+    failed = []
+    print(f"{'rows':>12}{'workers':>9}{'final MB':>11}{'peak MB':>10}{'ratio':>8}")
+    for size in args.rows.split(','):
+        paths = write_sales(args.data, parse_rows(size))
+        for workers in args.workers.split(','):
+            result = measure_ingest(paths, int(workers))
+            print(f"{result['rows']:>12,}{workers:>9}{result['final_bytes'] / 1e6:>11.1f}"
+                  f"{result['peak_bytes'] / 1e6:>10.1f}{result['ratio']:>8.2f}")
+            if result['ratio'] > args.max_ratio:
+                failed.append(f"{size} with {workers} workers: {result['ratio']:.2f}x")
+    if failed:
+        sys.exit(f"peak ingest memory is above {args.max_ratio:g}x the final frame for {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
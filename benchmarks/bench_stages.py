@@ -0,0 +1,109 @@
+"""Per-stage time and memory benchmark for Reader on synthetic exports.
+
+Each Reader stage is run in order on synthetic season files (see
+synthetic_sales.py). A stage is timed on its own, then run again under
+tracemalloc to record the peak memory it allocates. Results can be appended
+to a JSON lines file so stage regressions show up over time.
+
+    python benchmarks/bench_stages.py --rows 60k,1M --output bench_results.jsonl
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from soccer_tickets.raw_data_reader import Reader, concat_frames  # noqa: E402
+from synthetic_sales import parse_rows, write_sales  # noqa: E402
+
+
+def _read(reader: Reader, sales) -> list:
+    reader._scan_sales()
+    return [next(reader._read_season(season_file)) for season_file in reader.season_files]
+
+
+def _concatenate(reader: Reader, seasons: list) -> pd.DataFrame:
+    # concat_frames empties the frames it is given, and each stage runs twice, so it gets
+    # shallow copies and the read seasons are kept
+    return concat_frames([season.copy(deep = False) for season in seasons])
+
+
+def _rows(data) -> int:
+    """Number of rows in a stage's input or output (a frame, a list of frames or None)."""
+    if data is None:
+        return 0
+    return sum(len(frame) for frame in data) if isinstance(data, list) else len(data)
+
+
+# stage name -> function taking the reader and the output of the previous stage
+STAGES = [
+    ('read', _read),
+    ('concatenate', _concatenate),
+    ('opponent mapping', lambda reader, sales: reader._join_calendar(sales)),
+    ('zip cleaning', lambda reader, sales: reader._clean_zipcodes(sales)),
+    ('state lookup', lambda reader, sales: reader._purchase_states(sales)),
+    ('date parsing', lambda reader, sales: reader._purchase_date(sales)),
+    ('days_out', lambda reader, sales: reader._days_out(sales)),
+    ('ticket-type grouping', lambda reader, sales: reader._ticket_types(sales)),
+    ('purchaser identity', lambda reader, sales: reader._purchasers(sales)),
+]
+
+
+def run_stages(paths: list) -> list:
+    """Runs every stage on the season files, returning one result per stage."""
+    # streaming mode, so creating the reader does not load anything
+    reader = Reader(paths, chunksize = 1)
+    results = []
+    sales = None
+    for name, stage in STAGES:
+        start = time.perf_counter()
+        output = stage(reader, sales)
+        seconds = time.perf_counter() - start
+        del output
+
+        tracemalloc.start()
+        output = stage(reader, sales)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({'stage': name, 'seconds': seconds, 'peak_mb': peak / 1e6,
+                        'rows_in': _rows(sales), 'rows_out': _rows(output)})
+        sales = output
+    return results
+
+
+def git_commit() -> str:
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd = ROOT, capture_output = True, text = True)
+    return result.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--rows', default = '60k', help = 'comma separated sizes, e.g. 60k,1M,10M')
+    parser.add_argument('--data', default = os.path.join(ROOT, 'bench_data'), help = 'folder for the synthetic files')
+    parser.add_argument('--output', default = None, help = 'append results to this JSON lines file')
+    args = parser.parse_args()
+
+    for size in args.rows.split(','):
+        rows = parse_rows(size)
+        results = run_stages(write_sales(args.data, rows))
+        print(f"\n{rows:,} rows")
+        print(f"{'stage':<22}{'seconds':>10}{'peak MB':>10}{'rows out':>12}")
+        for result in results:
+            print(f"{result['stage']:<22}{result['seconds']:>10.3f}{result['peak_mb']:>10.1f}{result['rows_out']:>12,}")
+
+        if args.output:
+            with open(args.output, 'a') as file:
+                for result in results:
+                    file.write(json.dumps({'rows': rows, 'commit': git_commit(),
+                                           'time': time.strftime('%Y-%m-%dT%H:%M:%S'), **result}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
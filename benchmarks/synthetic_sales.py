@@ -0,0 +1,164 @@
+"""Synthetic ticket sales exports for benchmarking Reader.
+
+The files look like the real season exports: every column in the export
+layout (including the ones Reader drops), valid, zip+4, short, alphabetic and
+missing zipcodes, every known ticket type plus a few unknown ones, every
+regular season, playoff and cup event code in the season calendar, purchase
+timestamps before each game, and latin1 owner names in the 2024 file.
+
+    python benchmarks/synthetic_sales.py --rows 1M --out /tmp/sales
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from soccer_tickets.raw_data_reader import load_season_calendar, load_ticket_types
+
+# every ticket type in the packaged mapping, so edits to data/ticket_types.csv are exercised
+TICKET_TYPES = list(load_ticket_types().index)
+UNKNOWN_TICKET_TYPES = ['Legacy Voucher', 'Test Ticket']
+
+FIRST_NAMES = ['John', 'Jane', 'Michael', 'Sarah', 'David', 'Emily', 'Chris', 'Megan', 'Ryan', 'Laura']
+LAST_NAMES = ['Smith', 'Johnson', 'Kowalski', 'Murphy', 'Nguyen', 'Miller', 'Davis', 'Garcia', 'Lee', 'Brown']
+LATIN1_NAMES = ['Núñez, José', 'Müller, Jürgen', 'Côté, Amélie', 'Peña, Íñigo', 'Søren, Åse']
+TICKET_COMPANIES = ['Optimal Ticketing', 'Tix, Vet']
+
+COLUMNS = ['acct_id', 'event_name', 'section_name', 'row_name', 'first_seat', 'last_seat',
+           'num_seats', 'price_code', 'promo_code', 'ticket_type', 'block_purchase_price',
+           'owner_name', 'add_datetime', 'add_usr', 'acct_rep_id', 'assoc_acct_id',
+           'acct_type_desc', 'zip']
+
+SEASON_ENCODINGS = {2023: 'utf-8', 2024: 'latin1'}
+
+
+def parse_rows(text: str) -> int:
+    """Turns row counts like 60k, 1M or 10M into integers."""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def _zipcodes(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Zipcodes as they appear in exports, mostly Pennsylvania with some malformed ones."""
+    valid = rng.integers(501, 99951, n)
+    valid = np.where(rng.random(n) < 0.7, rng.integers(15001, 19641, n), valid)
+    zips = pd.Series(valid).astype(str).str.zfill(5)
+    kind = rng.random(n)
+    zips = zips.where(kind >= 0.05, zips + '-' + pd.Series(rng.integers(1000, 9999, n)).astype(str))
+    zips = zips.where((kind < 0.05) | (kind >= 0.08), zips.str.lstrip('0'))
+    zips = zips.where((kind < 0.08) | (kind >= 0.10), pd.Series(rng.choice(['N2L 3G1', 'SW1A 1AA', 'abcde', '1-234'], n)))
+    return zips.where((kind < 0.10) | (kind >= 0.12), None).to_numpy()
+
+
+def _owner_names(rng: np.random.Generator, n: int, latin1: bool) -> np.ndarray:
+    names = (pd.Series(rng.choice(LAST_NAMES, n)) + ', ' + pd.Series(rng.choice(FIRST_NAMES, n))).to_numpy()
+    special = rng.random(n)
+    names = np.where(special < 0.02, rng.choice(TICKET_COMPANIES, n), names)
+    if latin1:
+        names = np.where((special >= 0.02) & (special < 0.05), rng.choice(LATIN1_NAMES, n), names)
+    return names
+
+
+def sales_chunk(rng: np.random.Generator, calendar: pd.DataFrame, season: int, n: int, start_id: int) -> pd.DataFrame:
+    """Makes n rows of one season's export.
+
+    Arg:
+        rng (np.random.Generator): random numbers
+        calendar (pd.DataFrame): season calendar, from load_season_calendar
+        season (int): season year, e.g. 2024
+        n (int): number of rows
+        start_id (int): first account id
+
+    Return:
+        pd.DataFrame: raw sales rows in the export layout
+    """
+    events = calendar[calendar.index.str.startswith(str(season)[2:])]
+    # playoff and cup games have no date in the calendar, put them at the end of the season
+    game_dates = events['game_date'].fillna(pd.Timestamp(f'{season}-10-31'))
+    pick = rng.integers(0, len(events), n)
+    days_out = np.minimum(rng.exponential(20, n).astype('int64'), 200)
+    seconds = rng.integers(8 * 3600, 23 * 3600, n)
+    purchased = (game_dates.to_numpy()[pick] - days_out.astype('timedelta64[D]')
+                 + seconds.astype('timedelta64[s]'))
+    first_seat = rng.integers(1, 30, n)
+    num_seats = rng.integers(1, 9, n)
+    ticket_types = np.where(rng.random(n) < 0.005, rng.choice(UNKNOWN_TICKET_TYPES, n),
+                            rng.choice(TICKET_TYPES, n))
+    return pd.DataFrame({
+        'acct_id': rng.integers(start_id, start_id + max(n // 3, 1), n),
+        'event_name': events.index.to_numpy()[pick],
+        'section_name': rng.choice(['GA', 'Grandstand', 'Riverside', 'Party Deck', 'Suite'], n),
+        'row_name': rng.choice(list('ABCDEFGH'), n),
+        'first_seat': first_seat,
+        'last_seat': first_seat + num_seats - 1,
+        'num_seats': num_seats,
+        'price_code': rng.choice(['A', 'B', 'C', 'GRP'], n),
+        'promo_code': rng.choice(['', 'FLEX', 'BDAY'], n),
+        'ticket_type': ticket_types,
+        'block_purchase_price': np.round(num_seats * rng.choice([10.0, 15.0, 22.5, 30.0, 45.0], n), 2),
+        'owner_name': _owner_names(rng, n, SEASON_ENCODINGS.get(season) == 'latin1'),
+        'add_datetime': pd.Series(purchased).dt.strftime('%m/%d/%y %H:%M').to_numpy(),
+        'add_usr': rng.choice(['web', 'box_office', 'archtics'], n),
+        'acct_rep_id': rng.integers(1, 20, n),
+        'assoc_acct_id': rng.integers(1, 1000, n),
+        'acct_type_desc': rng.choice(['Individual', 'Group', 'Corporate'], n),
+        'zip': _zipcodes(rng, n),
+    }, columns = COLUMNS)
+
+
+def write_season(path: str, season: int, rows: int, seed: int = 0, chunk_rows: int = 500_000) -> str:
+    """Writes one season's synthetic export in chunks, so 10M row files fit in memory.
+
+    Arg:
+        path (str): csv file to write
+        season (int): season year
+        rows (int): number of rows
+        seed (int, optional): random seed. Defaults to 0.
+        chunk_rows (int, optional): rows generated at a time. Defaults to 500,000.
+
+    Return:
+        str: path of the written file
+    """
+    rng = np.random.default_rng([seed, season])
+    calendar = load_season_calendar()
+    encoding = SEASON_ENCODINGS.get(season, 'utf-8')
+    for start in range(0, rows, chunk_rows):
+        chunk = sales_chunk(rng, calendar, season, min(chunk_rows, rows - start), start)
+        chunk.to_csv(path, mode = 'w' if start == 0 else 'a', header = start == 0,
+                     index = False, encoding = encoding)
+    return path
+
+
+def write_sales(out_dir: str, rows: int, seed: int = 0, seasons = (2023, 2024)) -> list:
+    """Writes one synthetic export per season, splitting the rows evenly. Files that were
+    already written with the same row count and seed are reused.
+
+    Return:
+        list: paths of the season files
+    """
+    os.makedirs(out_dir, exist_ok = True)
+    paths = []
+    for season in seasons:
+        path = os.path.join(out_dir, f'{season}_Sales_{rows}_{seed}.csv')
+        if not os.path.exists(path):
+            write_season(path, season, rows // len(seasons), seed)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--rows', default = '60k', help = 'total rows across seasons, e.g. 60k, 1M, 10M')
+    parser.add_argument('--out', default = 'bench_data')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+    for path in write_sales(args.out, parse_rows(args.rows), args.seed):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+
+def purchaser_seasons(sales: pd.DataFrame) -> pd.DataFrame:
+    """This sums every purchaser's purchases in each season with one sort based groupby.
+    Purchases without a purchaser_key (see purchaser_keys) are left out.
+
+    Arg:
+        sales (pd.DataFrame): cleaned sales with purchaser_key, year and event_name columns,
+        e.g. reader.require('purchaser_key')
+
+    Return:
+        pd.DataFrame: purchases, games and tickets (when the sales have num_seats) for each
+        purchaser and year, indexed by purchaser_key and year
+    """
+    sales = sales[sales['purchaser_key'].notna()]
+    groups = sales.groupby([sales['purchaser_key'], sales['year'].astype('int64')], sort = True, observed = True)
+    seasons = pd.DataFrame({'purchases': groups.size(), 'games': groups['event_name'].nunique()})
+    if 'num_seats' in sales.columns:
+        seasons['tickets'] = groups['num_seats'].sum()
+    return seasons
+
+
+def repeat_purchases(sales: pd.DataFrame) -> pd.DataFrame:
+    """This counts the purchasers of each season and how many of them came back for more than
+    one game.
+
+    Arg:
+        sales (pd.DataFrame): cleaned sales with purchaser_key, year and event_name columns
+
+    Return:
+        pd.DataFrame: purchasers, repeat_purchasers, repeat_rate, purchases_per_purchaser and
+        games_per_purchaser, indexed by year
+    """
+    seasons = purchaser_seasons(sales).reset_index()
+    groups = seasons.groupby('year')
+    table = pd.DataFrame({'purchasers': groups.size(),
+                          'repeat_purchasers': (seasons['games'] > 1).groupby(seasons['year']).sum(),
+                          'purchases_per_purchaser': groups['purchases'].mean(),
+                          'games_per_purchaser': groups['games'].mean()})
+    table.insert(2, 'repeat_rate', table['repeat_purchasers'] / table['purchasers'])
+    return table
+
+
+def _season_masks(seasons: pd.DataFrame) -> pd.Series:
+    """Returns a bit mask of the years each purchaser bought in (bit 0 for year 0, and so on)."""
+    years = seasons.index.get_level_values('year').to_numpy()
+    bits = pd.Series(np.left_shift(1, years).astype('int64'), index = seasons.index.get_level_values('purchaser_key'))
+    # each purchaser has one row per year, so the sum is the same as or-ing the bits
+    return bits.groupby(level = 0, sort = False).sum()
+
+
+def retention(sales: pd.DataFrame) -> pd.DataFrame:
+    """This finds how many purchasers of each season bought again the next season.
+
+    Arg:
+        sales (pd.DataFrame): cleaned sales with purchaser_key, year and event_name columns
+
+    Return:
+        pd.DataFrame: purchasers, retained (bought again the next year) and retention_rate,
+        indexed by year (the last year has no next season and is left out)
+    """
+    masks = _season_masks(purchaser_seasons(sales)).to_numpy()
+    years = range(int(sales['year'].max()) if len(sales) else 0)
+    purchasers = [int(((masks >> year) & 1).sum()) for year in years]
+    retained = [int(((masks >> year) & (masks >> (year + 1)) & 1).sum()) for year in years]
+    table = pd.DataFrame({'purchasers': purchasers, 'retained': retained}, index = pd.Index(years, name = 'year'))
+    table['retention_rate'] = table['retained'] / table['purchasers']
+    return table
+
+
+def cohorts(sales: pd.DataFrame, rates: bool = False) -> pd.DataFrame:
+    """This groups purchasers by the season they first bought in (their cohort) and counts how
+    many of each cohort bought in every season.
+
+    Arg:
+        sales (pd.DataFrame): cleaned sales with purchaser_key, year and event_name columns
+        rates (bool, optional): give the share of the cohort instead of the number of
+        purchasers. Defaults to False.
+
+    Return:
+        pd.DataFrame: purchasers (or share of the cohort), indexed by cohort with a column for each year
+    """
+    seasons = purchaser_seasons(sales).reset_index()[['purchaser_key', 'year']]
+    first_year = seasons.groupby('purchaser_key', sort = False)['year'].transform('min')
+    table = seasons.groupby([first_year.rename('cohort'), seasons['year']]).size().unstack(fill_value = 0)
+    if rates:
+        # a cohort's size is its count in the year it started
+        sizes = pd.Series([table.at[cohort, cohort] for cohort in table.index], index = table.index)
+        table = table.div(sizes, axis = 0)
+    return table
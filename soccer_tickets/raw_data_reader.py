@@ -1,450 +1,1501 @@
 import pandas as pd # good for excel
 import os 
+import re
+import codecs
+import glob
+import importlib.util
+import io
+import json
+import time
+import logging
+import pickle
+import sys
+import tempfile
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
-from datetime import datetime
-from matplotlib import pyplot as plt
-import seaborn as sns
+
+if __name__ == '__main__' and not __package__:
+    # run as a script (python soccer_tickets/raw_data_reader.py), so the package is not on the path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from soccer_tickets.sales_index import SalesIndex
+from soccer_tickets.storage import cache_key, file_fingerprint, file_marks, frame_path, read_frame, source_hash, write_frame
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# bump when a change to the cleaning steps should invalidate cached total_sales files
+# (edits to this file already do)
+CACHE_VERSION = 1
+
+# owner names of the ticketing companies, whose purchases do not show where fans live
+TICKET_COMPANIES = ['Optimal Ticketing', "Tix, Vet"]
+
+# columns every sales export must have -> type they are read as. 
+# zip is read as text so leading zeroes are kept
+SALES_SCHEMA = {
+    'event_name': str,
+    'ticket_type': str,
+    'owner_name': str,
+    'add_datetime': str,
+    'zip': str,
+}
+
+# columns read with a fixed type when an export has them
+OPTIONAL_SCHEMA = {
+    'num_seats': 'Int32',
+    'block_purchase_price': 'float64',
+}
+
+# money columns, kept as float64 by compact_frame (float32 can not hold every amount to the cent)
+CURRENCY_COLUMNS = ['block_purchase_price']
+
+# columns that are not relevant to the research, these are never read
+DROPPED_COLUMNS = ['acct_id', 'price_code', 'promo_code', 'acct_rep_id', 'assoc_acct_id', 'acct_type_desc', 'add_usr']
+
+# one row per event code: game_type, opponent, opponent_state, game_date
+SEASON_CALENDAR = os.path.join(DATA_DIR, 'season_calendar.csv')
+CALENDAR_COLUMNS = ['game_type', 'opponent', 'opponent_state', 'game_date']
+
+# one row per ticket type: updated_ticket_type (sales team category), simple_ticket_type
+TICKET_TYPES = os.path.join(DATA_DIR, 'ticket_types.csv')
+TICKET_TYPE_COLUMNS = ['updated_ticket_type', 'simple_ticket_type']
+
+# formats of the add_datetime purchase timestamps, tried in order
+PURCHASE_DATE_FORMATS = ('%m/%d/%y %H:%M:%S', '%m/%d/%y %H:%M', '%m/%d/%y')
+
+# a sales file, with the details needed to read it: encoding, columns to read and their 
+# types (from sales_columns), season (e.g. 2024) and year (seasons numbered from 0)
+SeasonFile = namedtuple('SeasonFile', ['path', 'encoding', 'usecols', 'dtype', 'season', 'year'])
+
+# a step that creates derived columns: the name used in stage_report, the Reader method that 
+# runs it, the columns it needs and the columns it creates
+DerivedStage = namedtuple('DerivedStage', ['name', 'method', 'needs', 'creates'])
+
+DERIVED_STAGES = [
+    DerivedStage('join calendar', '_join_calendar', ['event_name'], CALENDAR_COLUMNS),
+    DerivedStage('clean zipcodes', '_clean_zipcodes', ['zip'], ['cleaned_zip', 'zip_as_int', 'zip_as_zip']),
+    DerivedStage('purchase states', '_purchase_states', ['zip_as_int'],
+                 ['purchase_state', 'purchase_abbreviations', 'In_or_Out']),
+    DerivedStage('purchase date', '_purchase_date', ['add_datetime'], ['purchase_date']),
+    DerivedStage('days out', '_days_out', ['purchase_date', 'game_date'], ['days_out', 'days_out_bucket']),
+    DerivedStage('ticket types', '_ticket_types', ['ticket_type'], TICKET_TYPE_COLUMNS),
+    DerivedStage('purchasers', '_purchasers', ['owner_name', 'zip_as_zip'], ['purchaser_key']),
+]
+
+# derived column -> the stage that creates it
+DERIVED_COLUMNS = {column: stage for stage in DERIVED_STAGES for column in stage.creates}
+
+# engines the sales files can be parsed with: 'c' is pandas' default, 'pyarrow' parses with 
+# several threads (needs pyarrow, and is not used for streaming)
+CSV_ENGINES = ('c', 'pyarrow')
+
+# rows of event codes read to work out which season a sales file is from
+SEASON_SAMPLE_ROWS = 1000
+
+# rows read at a time by Reader.iter_sales() when no chunksize is given
+STREAM_CHUNKSIZE = 100_000
+
+# part files an incremental dataset (Reader's dataset option) can have before they are merged into one
+DATASET_MAX_PARTS = 20
+
+# fewest rows Reader.apply_sharded() sends to worker processes, smaller data is faster in one process
+SHARD_MIN_ROWS = 10_000
+
+# lead time window name -> last day out in the window
+LEAD_TIME_WINDOWS = {
+    'day-of': 0,
+    '1-7 days': 7,
+    '8-30 days': 30,
+    'season-long': np.inf,
+}
+
+# state name -> state abbreviation
+STATES = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
+    "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "District of Columbia": "DC",
+    "Florida": "FL", "Georgia": "GA", "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL",
+    "Indiana": "IN", "Iowa": "IA", "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA",
+    "Maine": "ME", "Maryland": "MD", "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN",
+    "Mississippi": "MS", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH",
+    "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY", "North Carolina": "NC",
+    "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA",
+    "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD", "Tennessee": "TN",
+    "Texas": "TX", "Utah": "UT", "Vermont": "VT", "Virginia": "VA", "Washington": "WA",
+    "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY",
+}
+
+# zipcode ranges as (start, stop, state), with stop excluded like range().
+# When ranges overlap the first matching entry wins, so the order matters
+# (e.g. District of Columbia is listed before Maryland and Virginia).
+ZIP_RANGES = [
+    (99501, 99951, "Alaska"),
+    (35004, 36926, "Alabama"),
+    (71601, 72960, "Arkansas"), (75502, 75503, "Arkansas"),
+    (85001, 86557, "Arizona"),
+    (90001, 96162, "California"),
+    (80001, 81659, "Colorado"),
+    (6001, 6390, "Connecticut"), (6401, 6929, "Connecticut"),
+    (20001, 20040, "District of Columbia"), (20042, 20600, "District of Columbia"),
+    (20799, 20800, "District of Columbia"),
+    (19701, 19981, "Delaware"),
+    (32004, 34998, "Florida"),
+    (30001, 32000, "Georgia"), (39901, 39902, "Georgia"),
+    (96701, 96899, "Hawaii"),
+    (50001, 52809, "Iowa"), (68119, 68121, "Iowa"),
+    (83201, 83877, "Idaho"),
+    (60001, 63000, "Illinois"),
+    (46001, 47998, "Indiana"),
+    (66002, 67955, "Kansas"),
+    (40003, 42789, "Kentucky"),
+    (70001, 71233, "Louisiana"), (71234, 71498, "Louisiana"),
+    (1001, 2792, "Massachusetts"), (5501, 5545, "Massachusetts"),
+    (20331, 20332, "Maryland"), (20335, 20798, "Maryland"), (20812, 21931, "Maryland"),
+    (3901, 4993, "Maine"),
+    (48001, 49972, "Michigan"),
+    (55001, 56764, "Minnesota"),
+    (38601, 39777, "Mississippi"), (71233, 71234, "Mississippi"),
+    (59001, 59938, "Montana"),
+    (27006, 28910, "North Carolina"),
+    (58001, 58857, "North Dakota"),
+    (68001, 68119, "Nebraska"), (68122, 69368, "Nebraska"),
+    (3031, 3898, "New Hampshire"),
+    (7001, 8990, "New Jersey"),
+    (87001, 88442, "New Mexico"),
+    (88901, 89884, "Nevada"),
+    (10001, 14976, "New York"), (6390, 6391, "New York"),
+    (43001, 46000, "Ohio"),
+    (73001, 73200, "Oklahoma"), (73401, 74967, "Oklahoma"),
+    (97001, 97921, "Oregon"),
+    (15001, 19641, "Pennsylvania"),
+    (2801, 2941, "Rhode Island"),
+    (29001, 29949, "South Carolina"),
+    (57001, 57800, "South Dakota"),
+    (37010, 38590, "Tennessee"),
+    (75001, 75502, "Texas"), (75503, 80000, "Texas"), (88510, 88590, "Texas"), (73301, 73302, "Texas"),
+    (84001, 84785, "Utah"),
+    (20040, 20168, "Virginia"), (22001, 24659, "Virginia"),
+    (5001, 5495, "Vermont"), (5601, 5908, "Vermont"),
+    (98001, 99404, "Washington"),
+    (53001, 54991, "Wisconsin"),
+    (24701, 26887, "West Virginia"),
+    (82001, 83129, "Wyoming"),
+]
+
+
+def _build_zip_intervals(ranges: list) -> tuple:
+    """This flattens the (possibly overlapping) zipcode ranges into sorted, non-overlapping 
+    intervals so a zipcode can be found with a binary search instead of checking every range.
+
+    Arg:
+        ranges (list): (start, stop, state) tuples in priority order
+
+    Return:
+        tuple: interval starts, interval stops and the state name of each interval
+    """
+    bounds = sorted({bound for start, stop, _ in ranges for bound in (start, stop)})
+    starts, stops, states = [], [], []
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        state = next((name for start, stop, name in ranges if start <= low and high <= stop), None)
+        if state is None:
+            continue
+        if states and states[-1] == state and stops[-1] == low:
+            stops[-1] = high
+        else:
+            starts.append(low)
+            stops.append(high)
+            states.append(state)
+    return np.array(starts), np.array(stops), np.array(states, dtype = object)
+
+
+_ZIP_STARTS, _ZIP_STOPS, _ZIP_STATES = _build_zip_intervals(ZIP_RANGES)
+
+
+def _lookup_zip_state_values(zips: pd.Series) -> pd.DataFrame:
+    """This finds the purchase state, state abbreviation and in or out of state determination
+    for a column of zipcodes at once. Zipcodes that are missing or outside of every
+    known range get no state, an "unknown" abbreviation and "nan" for in or out of state.
+
+    Arg:
+        zips (pd.Series): zipcodes as integer values
+
+    Return:
+        pd.DataFrame: purchase_state, purchase_abbreviations and In_or_Out columns
+    """
+    values = pd.to_numeric(zips, errors = 'coerce').to_numpy(dtype = 'float64', na_value = np.nan)
+    position = np.searchsorted(_ZIP_STARTS, values, side = 'right') - 1
+    position = position.clip(0)
+    found = (values >= _ZIP_STARTS[position]) & (values < _ZIP_STOPS[position])
+
+    state = np.where(found, _ZIP_STATES[position], None)
+    abbreviation = np.array([STATES.get(name, "unknown") for name in _ZIP_STATES], dtype = object)
+    abbreviation = np.where(found, abbreviation[position], "unknown")
+    in_or_out = np.where(found, np.where(state == "Pennsylvania", "In State", "Out of State"), "nan")
+    return pd.DataFrame({'purchase_state': state,
+                         'purchase_abbreviations': abbreviation,
+                         'In_or_Out': in_or_out.astype(object)}, index = zips.index)
+
+
+def lookup_zip_states(zips: pd.Series) -> pd.DataFrame:
+    """This looks up the states of a whole column of zipcodes (see _lookup_zip_state_values), 
+    looking up each distinct zipcode (including missing ones) only once.
+
+    Arg:
+        zips (pd.Series): zipcodes as integer values
+
+    Return:
+        pd.DataFrame: purchase_state, purchase_abbreviations and In_or_Out columns
+    """
+    codes, uniques = pd.factorize(zips, use_na_sentinel = False)
+    rows = _lookup_zip_state_values(pd.Series(uniques)).take(codes)
+    rows.index = zips.index
+    return rows
+
+
+def load_season_calendar(calendar = SEASON_CALENDAR) -> pd.DataFrame:
+    """This loads the season calendar, which has one row per event code with the game type, 
+    opponent, opponent state and game date. A new season only needs new rows in the file.
+
+    Arg:
+        calendar (str or pd.DataFrame, optional): path to the calendar file, or a calendar 
+        that was already loaded. Defaults to SEASON_CALENDAR.
+
+    Return:
+        pd.DataFrame: season calendar indexed by event code
+    """
+    if isinstance(calendar, pd.DataFrame):
+        calendar = calendar.copy()
+        if 'event_name' in calendar.columns:
+            calendar = calendar.set_index('event_name')
+    else:
+        calendar = pd.read_csv(calendar, index_col = 'event_name', dtype = str)
+    calendar['game_date'] = pd.to_datetime(calendar['game_date'], format = '%Y-%m-%d')
+    return calendar[CALENDAR_COLUMNS]
+
+
+def apply_distinct(values: pd.Series, func) -> pd.DataFrame:
+    """This runs a function once over the distinct values of a column and spreads the results 
+    back out to every entry. Sales exports repeat the same event codes, zipcodes and ticket types
+    thousands of times, so this is much cheaper than working on every entry.
+
+    Arg:
+        values (pd.Series): column to transform
+        func (function): takes a pd.Series of distinct values and returns a pd.DataFrame 
+        with one row for each of them
+
+    Return:
+        pd.DataFrame: one row of results for every entry in values (missing values for missing entries)
+    """
+    codes, uniques = pd.factorize(values)
+    rows = func(pd.Series(uniques)).reset_index(drop = True)
+    rows = rows.reindex(codes)
+    rows.index = values.index
+    return rows
+
+
+def load_ticket_types(ticket_types = TICKET_TYPES) -> pd.DataFrame:
+    """This loads the ticket type mapping, which groups every ticket type into the sales team's 
+    categories (updated_ticket_type) and the simpler group, single game full or other split 
+    (simple_ticket_type). The sales team can edit the file to add or move ticket types.
+
+    Arg:
+        ticket_types (str or pd.DataFrame, optional): path to the mapping file, or a mapping 
+        that was already loaded. Defaults to TICKET_TYPES.
+
+    Raise:
+        ValueError: if a ticket type is listed more than once
+
+    Return:
+        pd.DataFrame: ticket type mapping indexed by ticket type
+    """
+    if isinstance(ticket_types, pd.DataFrame):
+        ticket_types = ticket_types.copy()
+        if 'ticket_type' in ticket_types.columns:
+            ticket_types = ticket_types.set_index('ticket_type')
+    else:
+        ticket_types = pd.read_csv(ticket_types, index_col = 'ticket_type', dtype = str)
+    repeated = ticket_types.index[ticket_types.index.duplicated()]
+    if len(repeated):
+        raise ValueError(f"Ticket types listed more than once: {', '.join(repeated)}")
+    return ticket_types[TICKET_TYPE_COLUMNS]
+
+
+def map_distinct(values: pd.Series, table: pd.DataFrame) -> pd.DataFrame:
+    """This looks up each distinct value in a table indexed by that value and spreads the 
+    matching rows back out to every entry. Values that are not in the table get missing values.
+
+    Arg:
+        values (pd.Series): values to look up
+        table (pd.DataFrame): lookup table indexed by the values
+
+    Return:
+        pd.DataFrame: one row from the table for every entry in values
+    """
+    return apply_distinct(values, lambda uniques: table.reindex(uniques))
+
+
+def _clean_zip_values(zips: pd.Series) -> pd.DataFrame:
+    """This cleans a column of zipcodes. Zipcodes are cut down to their first five characters, 
+    and anything that is not all numbers after that (letters, special characters) is dropped.
+    Leading zeroes that were lost when the zipcode was stored as a number are added back.
+
+    Arg:
+        zips (pd.Series): zipcodes as strings or numbers
+
+    Return:
+        pd.DataFrame: cleaned_zip, zip_as_int and zip_as_zip columns
+    """
+    zips = zips.astype('string').str.strip().str.replace(r'\.0+$', '', regex = True)
+    cleaned_zip = zips.str[:5]
+    is_number = cleaned_zip.str.fullmatch(r'\d+').fillna(False).astype(bool)
+    zip_as_int = pd.to_numeric(cleaned_zip.where(is_number)).astype('Int64')
+    zip_as_zip = zip_as_int.astype('string').str.zfill(5).where(zip_as_int >= 100)
+    return pd.DataFrame({'cleaned_zip': cleaned_zip,
+                         'zip_as_int': zip_as_int,
+                         'zip_as_zip': zip_as_zip})
+
+
+def clean_zipcodes(zips: pd.Series) -> pd.DataFrame:
+    """This cleans a whole column of zipcodes at once (see _clean_zip_values), 
+    cleaning each distinct zipcode only once.
+
+    Arg:
+        zips (pd.Series): zipcodes as strings or numbers
+
+    Return:
+        pd.DataFrame: cleaned_zip (str), zip_as_int (nullable int) and zip_as_zip (five digit str) columns
+    """
+    return apply_distinct(zips, _clean_zip_values)
+
+
+def _parse_timestamp_values(values: pd.Series, formats: tuple) -> pd.DataFrame:
+    """This parses timestamps with the given formats. Each format is only tried on the values 
+    that none of the earlier formats could parse.
+
+    Arg:
+        values (pd.Series): timestamps as strings
+        formats (tuple): strptime formats to try, in order
+
+    Return:
+        pd.DataFrame: timestamp column (NaT where no format matched)
+    """
+    parsed = pd.Series(pd.NaT, index = values.index, dtype = 'datetime64[ns]')
+    for date_format in formats:
+        missing = parsed.isna() & values.notna()
+        if not missing.any():
+            break
+        parsed = parsed.fillna(pd.to_datetime(values[missing], format = date_format, errors = 'coerce'))
+    return pd.DataFrame({'timestamp': parsed})
+
+
+def parse_timestamps(values: pd.Series, formats: tuple = PURCHASE_DATE_FORMATS) -> pd.DataFrame:
+    """This parses a whole column of timestamps, parsing each distinct timestamp only once.
+    Export files repeat the same timestamps thousands of times.
+
+    Arg:
+        values (pd.Series): timestamps as strings
+        formats (tuple, optional): strptime formats to try, in order. Defaults to PURCHASE_DATE_FORMATS.
+
+    Return:
+        pd.DataFrame: timestamp column as datetime64
+    """
+    return apply_distinct(values, lambda uniques: _parse_timestamp_values(uniques, formats))
+
+
+def bucket_days_out(days_out: pd.Series, windows: dict = LEAD_TIME_WINDOWS) -> pd.Series:
+    """This groups how many days out a ticket was purchased into lead time windows.
+    Each window runs from the day after the previous window ends through its own last day.
+
+    Arg:
+        days_out (pd.Series): days before the game the ticket was purchased
+        windows (dict, optional): window name -> last day out in the window, in order. 
+        Defaults to LEAD_TIME_WINDOWS.
+
+    Return:
+        pd.Series: window name for each entry (categorical, missing if days_out is missing or negative)
+    """
+    bins = [-1] + list(windows.values())
+    return pd.cut(days_out.astype('float64'), bins = bins, labels = list(windows))
+
+
+def sales_columns(path: str, encoding: str = None) -> tuple:
+    """This reads the header of a sales export and works out which columns to read and their types. 
+    Columns in DROPPED_COLUMNS are skipped, so they are never parsed.
+
+    Arg:
+        path (str): sales csv file
+        encoding (str, optional): file encoding. Defaults to None (utf-8).
+
+    Raise:
+        ValueError: if a column in SALES_SCHEMA is missing from the file
+
+    Return:
+        tuple: the columns to read, and the type of each column that has one
+    """
+    header = pd.read_csv(path, encoding = encoding, nrows = 0).columns
+    missing = [column for column in SALES_SCHEMA if column not in header]
+    if missing:
+        raise ValueError(f"{path} is missing the columns {', '.join(missing)}")
+    usecols = [column for column in header if column not in DROPPED_COLUMNS]
+    schema = {**OPTIONAL_SCHEMA, **SALES_SCHEMA}
+    dtype = {column: schema[column] for column in usecols if column in schema}
+    return usecols, dtype
+
+
+def detect_encoding(path: str, block_size: int = 1 << 20, start: int = 0) -> str:
+    """This checks if a sales file is valid utf-8. Older exports (like the 2024 sales) 
+    are latin1 instead.
+
+    Arg:
+        path (str): sales csv file
+        block_size (int, optional): bytes checked at a time. Defaults to 1 MB.
+        start (int, optional): only check from this byte offset on (the start of a line). Defaults to 0.
+
+    Return:
+        str: 'utf-8' or 'latin1'
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as file:
+        file.seek(start)
+        try:
+            while True:
+                block = file.read(block_size)
+                decoder.decode(block, final = not block)
+                if not block:
+                    return 'utf-8'
+        except UnicodeDecodeError:
+            return 'latin1'
+
+
+def file_tail(path: str, offset: int) -> io.BytesIO:
+    """This reads the rows of a csv file from a byte offset (the start of a line) to the end, with 
+    the header line in front, so they parse like a file of their own.
+
+    Arg:
+        path (str): csv file
+        offset (int): where the rows start
+
+    Return:
+        io.BytesIO: the header and the rows
+    """
+    with open(path, 'rb') as file:
+        header = file.readline()
+        file.seek(max(offset, len(header)))
+        return io.BytesIO(header + file.read())
+
+
+def read_sales_csv(path: str, encoding: str, usecols: list, dtype: dict, engine: str = 'c', chunksize: int = None):
+    """This parses a sales file with the chosen engine. The pyarrow engine parses with several 
+    threads, and decodes other encodings (e.g. latin1 exports) as it reads. Reading in chunks 
+    always uses the c engine.
+
+    Arg:
+        path (str or file): sales csv file, or its rows (see file_tail)
+        encoding (str): file encoding, from detect_encoding
+        usecols (list): columns to read
+        dtype (dict): type of each column that has one
+        engine (str, optional): 'c' or 'pyarrow'. Defaults to 'c'.
+        chunksize (int, optional): if given, the file is read this many rows at a time. Defaults to None.
+
+    Return:
+        pd.DataFrame, or an iterator of them when reading in chunks
+    """
+    if engine != 'pyarrow' or chunksize is not None:
+        return pd.read_csv(path, encoding = encoding, usecols = usecols, dtype = dtype, chunksize = chunksize)
+    return pd.read_csv(path, engine = 'pyarrow', encoding = encoding, usecols = usecols, dtype = dtype)
+
+
+def file_season(path: str, encoding: str = None) -> int:
+    """This works out which season a sales file is from, using the two digit year at the start 
+    of its event codes (e.g. 24RH0720 is 2024), or a year in the file name if that fails.
+
+    Arg:
+        path (str): sales csv file
+        encoding (str, optional): file encoding. Defaults to None (utf-8).
+
+    Raise:
+        ValueError: if neither the event codes nor the file name give the season
+
+    Return:
+        int: season year
+    """
+    events = pd.read_csv(path, encoding = encoding, usecols = ['event_name'], dtype = str,
+                         nrows = SEASON_SAMPLE_ROWS)['event_name']
+    years = events.str.extract(r'^(\d{2})', expand = False).dropna()
+    if not years.empty:
+        return 2000 + int(years.mode()[0])
+    match = re.search(r'(20\d{2})', os.path.basename(path))
+    if match:
+        return int(match.group(1))
+    raise ValueError(f"Can't tell which season {path} is from its event codes or file name")
+
+
+def check_schema_drift(paths: list, schemas: list):
+    """This prints a warning when sales files do not have the same columns, for example when 
+    the export layout changed between seasons.
+
+    Arg:
+        paths (list): sales files
+        schemas (list): (columns, types) for each file, from sales_columns
+    """
+    columns = [set(usecols) for usecols, _ in schemas]
+    shared = set.intersection(*columns)
+    for path, file_columns in zip(paths, columns):
+        extra = file_columns - shared
+        if extra:
+            print(f"Schema drift: {os.path.basename(path)} has columns the other sales files do not: "
+                  f"{', '.join(sorted(extra))}")
+
+
+def row_hashes(sales: pd.DataFrame) -> pd.Series:
+    """Returns a uint64 hash of the SALES_SCHEMA columns of every raw sales row."""
+    return pd.util.hash_pandas_object(sales[list(SALES_SCHEMA)], index = False)
+
+
+def purchase_keys(sales: pd.DataFrame = None, hashes: pd.Series = None, seen: np.ndarray = None) -> pd.Series:
+    """This gives every raw sales row a key that stays the same in later exports of the same 
+    season, built from the SALES_SCHEMA columns. Identical rows (e.g. the same buyer making the 
+    same purchase twice) are told apart by how many times the row appeared before.
+
+    Arg:
+        sales (pd.DataFrame, optional): raw sales data
+        hashes (pd.Series, optional): row_hashes of the sales, in order, instead of the sales
+        seen (np.ndarray, optional): row_hashes of the rows that came before these (e.g. the 
+        start of the same export, read earlier). Defaults to None.
+
+    Return:
+        pd.Series: uint64 purchase key for each row
+    """
+    row_hash = row_hashes(sales) if hashes is None else hashes
+    repeat = row_hash.groupby(row_hash).cumcount()
+    if seen is not None and len(seen):
+        earlier = pd.Series(seen[np.isin(seen, row_hash.to_numpy())]).value_counts()
+        repeat += row_hash.map(earlier).fillna(0).astype('int64')
+    return pd.util.hash_pandas_object(pd.DataFrame({'row': row_hash, 'repeat': repeat}), index = False)
+
+
+def _normalize_name_values(names: pd.Series) -> pd.DataFrame:
+    """This puts owner names in one form so the same buyer matches across exports: accents are 
+    removed (e.g. from latin1 exports), letters are lowercased, punctuation is dropped and the 
+    words are sorted, so "Smith, John", "SMITH JOHN" and "John Smith" are the same name.
+
+    Arg:
+        names (pd.Series): owner names
+
+    Return:
+        pd.DataFrame: normalized_name column (missing when nothing is left of the name)
+    """
+    names = (names.astype('string').str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+             .str.lower().str.replace(r'[^a-z0-9 ]+', ' ', regex = True))
+    words = names.str.split()
+    normalized = words.map(lambda name: ' '.join(sorted(name)) if isinstance(name, list) else None)
+    return pd.DataFrame({'normalized_name': normalized.astype('string').replace('', pd.NA)})
+
+
+def purchaser_keys(sales: pd.DataFrame) -> pd.Series:
+    """This gives every purchase a key for the buyer, a hash of the normalized owner name 
+    (see _normalize_name_values) and the five digit zipcode, so the same buyer can be matched 
+    across games and seasons. Each distinct name is normalized once. Purchases without an owner 
+    name, or bought through ticketing companies, have no key since they are not one buyer.
+
+    Arg:
+        sales (pd.DataFrame): sales with owner_name and zip_as_zip columns
+
+    Return:
+        pd.Series: purchaser key (nullable uint64) for each purchase
+    """
+    # the distinct owner names and zipcodes are normalized and hashed, then the two hashes of 
+    # every purchase are combined (code -1, a missing value, picks the entry added at the end)
+    owner_codes, owners = pd.factorize(sales['owner_name'])
+    zip_codes, zips = pd.factorize(sales['zip_as_zip'])
+    names = _normalize_name_values(pd.Series(owners))['normalized_name']
+    name_hashes = np.append(pd.util.hash_array(names.fillna('').to_numpy(dtype = object)), np.uint64(0))
+    zip_hashes = pd.util.hash_array(np.append(np.asarray(zips, dtype = object), ''))
+    known = np.append((names.notna() & ~pd.Index(owners).isin(TICKET_COMPANIES)).to_numpy(), False)
+
+    keys = name_hashes[owner_codes]
+    keys *= np.uint64(0x9E3779B97F4A7C15)
+    keys ^= zip_hashes[zip_codes]
+    return pd.Series(pd.arrays.IntegerArray(keys, ~known[owner_codes]), index = sales.index)
+
+
+def _arrow_memory(pool) -> tuple:
+    """Returns the bytes pyarrow's memory pool holds now and at its peak, or zeros without pyarrow."""
+    return (0, 0) if pool is None else (pool.bytes_allocated(), pool.max_memory())
+
+
+def _arrow_memory_pool():
+    """Returns pyarrow's memory pool, which holds arrow backed columns (e.g. strings on pandas 3), 
+    or None if pyarrow has not been imported, in which case nothing is in it."""
+    pyarrow = sys.modules.get('pyarrow')
+    return None if pyarrow is None else pyarrow.default_memory_pool()
+
+
+def _row_count(data):
+    """Number of rows in a stage's input or output, or None if it has no length."""
+    if isinstance(data, list):
+        return sum(_row_count(part) or 0 for part in data)
+    return len(data) if isinstance(data, (pd.DataFrame, pd.Series)) else None
+
+
+def shard_rows(keys: pd.Series, shards: int) -> list:
+    """This splits the rows into shards of about the same size, keeping all the rows with the 
+    same key (e.g. every purchase for one game) in the same shard. The largest keys are placed 
+    first, each in the shard with the fewest rows so far.
+
+    Arg:
+        keys (pd.Series): key of every row
+        shards (int): number of shards
+
+    Return:
+        list: row numbers (np.ndarray, in order) of each shard that has rows
+    """
+    codes, uniques = pd.factorize(keys, use_na_sentinel = False)
+    sizes = np.bincount(codes, minlength = len(uniques))
+    shard_of_key = np.empty(len(uniques), dtype = 'int64')
+    shard_sizes = np.zeros(max(shards, 1), dtype = 'int64')
+    for key in np.argsort(-sizes, kind = 'stable'):
+        shard = shard_sizes.argmin()
+        shard_of_key[key] = shard
+        shard_sizes[shard] += sizes[key]
+    shard_of_row = shard_of_key[codes]
+    return [rows for rows in (np.flatnonzero(shard_of_row == shard) for shard in range(len(shard_sizes))) if len(rows)]
+
+
+def _apply_rows(func, rows: pd.DataFrame) -> np.ndarray:
+    """Runs a row function on every row of a shard, with the row's columns as its arguments. 
+    This runs in a worker process for Reader.apply_sharded().
+
+    Return:
+        np.ndarray: one result for every row, in order
+    """
+    results = np.empty(len(rows), dtype = object)
+    for i, row in enumerate(rows.itertuples(index = False, name = None)):
+        results[i] = func(*row)
+    return results
+
+
+def _add_columns(sales: pd.DataFrame, columns) -> pd.DataFrame:
+    """This adds new columns to sales data that the cleaning steps own (read from a file, or made 
+    by a row filter), in place. assign would make a new frame each time, which copies every 
+    column with pandas versions that do not copy on write, so each column is written once here.
+
+    Arg:
+        sales (pd.DataFrame): sales data to add the columns to
+        columns (dict or pd.DataFrame): column name -> values, with the same index as sales
+
+    Return:
+        pd.DataFrame: the same sales data, with the columns
+    """
+    for name, values in columns.items():
+        sales[name] = values
+    return sales
+
+
+def _keep_rows(sales: pd.DataFrame, keep: pd.Series) -> pd.DataFrame:
+    """This keeps the rows where keep is True as a new frame of its own. Unlike sales[keep] it is 
+    not marked as a slice of sales, so columns can be added to it without SettingWithCopy warnings."""
+    return sales.take(np.flatnonzero(keep.to_numpy(dtype = bool)))
+
+
+def concat_frames(frames: list) -> pd.DataFrame:
+    """This concatenates frames one column at a time, like pd.concat(frames, ignore_index = True),
+    removing each column from the frames once it has been copied. Peak memory is about the 
+    result plus one column, instead of the frames and the result at the same time. The frames 
+    are left empty.
+
+    Arg:
+        frames (list): pd.DataFrame to concatenate, in order
+
+    Return:
+        pd.DataFrame: the rows of every frame
+    """
+    frames = [frame for frame in frames if len(frame.columns)]
+    if len(frames) == 1:
+        frames[0].reset_index(drop = True, inplace = True)
+        return frames[0]
+    # columns of the same type share memory (pandas keeps them in one block), which is only freed 
+    # once all of them are removed, so they are copied one after another
+    names = list(dict.fromkeys(name for frame in frames for name in frame.columns))
+    dtypes = {name: str(frame[name].dtype) for frame in reversed(frames) for name in frame.columns}
+    columns = {}
+    for name in sorted(names, key = lambda name: dtypes[name]):
+        parts = [frame[name] if name in frame.columns else pd.Series(np.nan, index = frame.index, name = name)
+                 for frame in frames]
+        columns[name] = pd.concat(parts, ignore_index = True)
+        del parts
+        for frame in frames:
+            if name in frame.columns:
+                del frame[name]
+    return pd.DataFrame({name: columns[name] for name in names}, copy = False)
+
+
+def compact_frame(frame: pd.DataFrame, max_unique_ratio: float = 0.5) -> pd.DataFrame:
+    """This stores text columns whose values repeat as categoricals and downcasts integer and 
+    float columns to the smallest type that holds their values. Money columns (CURRENCY_COLUMNS) 
+    stay float64, so amounts and their totals keep their cents.
+
+    Arg:
+        frame (pd.DataFrame): data to compact
+        max_unique_ratio (float, optional): a text column becomes a categorical if its number of 
+        distinct values is at most this fraction of its length. Defaults to 0.5.
+
+    Return:
+        pd.DataFrame: compacted data
+    """
+    columns = {}
+    for name, column in frame.items():
+        if pd.api.types.is_bool_dtype(column.dtype) or name in CURRENCY_COLUMNS:
+            continue
+        if pd.api.types.is_object_dtype(column.dtype) or pd.api.types.is_string_dtype(column.dtype):
+            if column.nunique() <= max_unique_ratio * len(column):
+                columns[name] = column.astype('category')
+        elif pd.api.types.is_integer_dtype(column.dtype):
+            columns[name] = pd.to_numeric(column, downcast = 'integer')
+        elif pd.api.types.is_float_dtype(column.dtype):
+            columns[name] = pd.to_numeric(column, downcast = 'float')
+    return frame.assign(**columns)
+
 
 class Reader():
-    def __init__(self, sales23, sales24, drop_bulk = False):
-        """Read in sales data for 2023-2024"""
-        self.sales23 = sales23
-        self.sales24 = sales24
+    def __init__(self, *sales, drop_bulk = False, regular_season = True, purchase_dates = None,
+                 calendar = SEASON_CALENDAR, ticket_types = TICKET_TYPES,
+                 lead_time_windows = None, date_formats = PURCHASE_DATE_FORMATS, compact = False,
+                 chunksize = None, cache_dir = None, workers = None, dataset = None,
+                 profile = False, trace_memory = False, on_stage = None, lazy = False, csv_engine = 'c'):
+        """Read in sales data for any number of seasons (e.g. Reader(sales23, sales24))
+
+        Arg:
+            *sales (str): paths to the season sales files, or a single list of them. 
+            Each file is one season, which is taken from its event codes (or its file name).
+            drop_bulk (bool, optional): drop tickets bought through ticketing companies (see 
+            _ticket_companies), for research on zipcodes. Defaults to False.
+            regular_season (bool, optional): keep only regular season games. Defaults to True.
+            purchase_dates (tuple, optional): keep only purchases from the first date up to (not 
+            including) the second, either can be None. Defaults to None.
+            calendar (str or pd.DataFrame, optional): season calendar file, or an already loaded 
+            calendar, used to look up each event code. Defaults to the packaged SEASON_CALENDAR.
+            ticket_types (str or pd.DataFrame, optional): ticket type mapping file, or an already loaded 
+            mapping, used to group ticket types. Defaults to the packaged TICKET_TYPES.
+            lead_time_windows (dict, optional): if given, days_out is also grouped into these windows
+            in a days_out_bucket column (e.g. LEAD_TIME_WINDOWS). Defaults to None.
+            date_formats (tuple, optional): formats of the add_datetime purchase timestamps, tried 
+            in order. Defaults to PURCHASE_DATE_FORMATS.
+            compact (bool, optional): store repeated text columns as categoricals and shrink numeric 
+            columns to the smallest type that fits. Defaults to False.
+            chunksize (int, optional): streaming mode. The files are not loaded into total_sales;
+            instead iter_sales() and write_sales() read and clean this many rows at a time. 
+            Defaults to None.
+            cache_dir (str, optional): folder to cache the cleaned total_sales in. The cache is used 
+            while the sales files, the cleaning code and the options above are unchanged, and is 
+            rebuilt automatically otherwise. Defaults to None (no cache).
+            workers (int, optional): number of processes used to load and clean the season files 
+            in parallel. Defaults to None (one per file, up to the number of cores).
+            dataset (str, optional): incremental mode. The cleaned sales are saved in part files 
+            next to this path, and each new Reader only reads, cleans and saves the rows of the 
+            sales files that were not seen before (see _update_dataset). Defaults to None.
+            profile (bool, optional): record the wall time and rows in and out of every ingest step 
+            in stage_report, and log them. Defaults to False.
+            trace_memory (bool, optional): when profiling, also record the peak memory of every step. 
+            Tracing slows the steps down unevenly, so their wall time is then not recorded 
+            (seconds is None). Defaults to False.
+            on_stage (function, optional): when profiling, called with each stage_report record as 
+            it is made. Defaults to None.
+            lazy (bool, optional): only create the derived columns needed to filter the rows when 
+            loading. Every other derived column is created (with whatever it needs) the first time 
+            it is used through reader[column] or require(), and then kept. Defaults to False.
+            csv_engine (str, optional): engine used to parse the sales files, 'c' or 'pyarrow' 
+            (multi-threaded, see read_sales_csv). Falls back to 'c' if pyarrow is not installed. 
+            Defaults to 'c'.
+
+        Raise:
+            ValueError: if csv_engine is not one of CSV_ENGINES
+        """
+        if len(sales) == 1 and isinstance(sales[0], (list, tuple)):
+            sales = sales[0]
+        self.sales = list(sales)
+        self.drop_bulk = drop_bulk
+        self.regular_season = regular_season
+        self.purchase_dates = purchase_dates
+        self.calendar = load_season_calendar(calendar)
+        self.ticket_types = load_ticket_types(ticket_types)
+        # ticket group -> simple ticket group, built once for simpler_ticket_type
+        self.simple_ticket_types = (self.ticket_types.drop_duplicates('updated_ticket_type')
+                                    .set_index('updated_ticket_type')['simple_ticket_type'])
+        self.unmapped_ticket_types = set()  # ticket types missing from the mapping
+        self._in_worker = False
+        self.lead_time_windows = lead_time_windows
+        self.date_formats = date_formats
+        self.compact = compact
+        self.chunksize = chunksize
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.dataset = dataset
+        self.new_rows = None  # rows appended by the last incremental update
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.on_stage = on_stage
+        self.lazy = lazy
+        if csv_engine not in CSV_ENGINES:
+            raise ValueError(f"csv_engine must be one of {', '.join(CSV_ENGINES)}, not {csv_engine}")
+        if csv_engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+            print("pyarrow is not installed, reading the sales files with the c engine")
+            csv_engine = 'c'
+        self.csv_engine = csv_engine
+        self.stage_report = []  # one record per ingest step, when profiling
+        self._source = None  # sales file being loaded, for stage_report
+        self.season_files = None  # SeasonFile for each sales file, filled in by _scan_sales
         self.total_sales = None  # Initialize an empty attribute
-        self._concatenate_sales()
+        self.memory_usage = None  # bytes before and after compacting
+        self._query = None  # SalesIndex over total_sales, made the first time query is used
+
+        # in streaming mode the cleaned sales are read through iter_sales() or write_sales() instead
+        if chunksize is None and dataset is not None:
+            self._update_dataset()
+
+        elif chunksize is None:
+            cache_path = self._cache_path()
+            if cache_path is not None and os.path.exists(frame_path(cache_path)):
+                self.total_sales = read_frame(cache_path)
+                return
+
+            self._concatenate_sales()
  
-        if self.total_sales is not None:
+            if not self.total_sales.empty:
+                if compact:
+                    self.total_sales = self._run_stage('compact', self._compact, self.total_sales)
+
+                if cache_path is not None:
+                    self._write_cache(cache_path)
+
+
+    def _code_version(self) -> str:
+        """Returns a hash of everything besides the sales files that changes the cleaned sales:
+        the cleaning code, CACHE_VERSION, the season calendar, the ticket type mapping and the reader's options.
+        """
+        return cache_key(CACHE_VERSION, source_hash(__file__), self.calendar.to_csv(), self.ticket_types.to_csv(),
+                         self.lead_time_windows, self.date_formats, self.compact, self.lazy,
+                         self.drop_bulk, self.regular_season, self.purchase_dates)
+
+
+    def _cache_path(self) -> str:
+        """Returns the cache file for the current sales files, cleaning code and options 
+        (without the file extension), or None if there is no cache or a sales file is missing.
+        """
+        sales = self.sales
+        if self.cache_dir is None or not sales or not all(os.path.exists(path) for path in sales):
+            return None
+        key = cache_key(self._code_version(), [file_fingerprint(path) for path in sales])
+        files = cache_key([os.path.abspath(path) for path in sales])
+        return os.path.join(self.cache_dir, f"total_sales-{files[:12]}-{key[:16]}")
+
+
+    def _write_cache(self, cache_path: str):
+        """Saves total_sales to the cache, removing older cache files for the same sales files."""
+        os.makedirs(self.cache_dir, exist_ok = True)
+        for stale in glob.glob(cache_path.rsplit('-', 1)[0] + '-*'):
+            os.remove(stale)
+        write_frame(self.total_sales, cache_path)
+
+
+    def _update_dataset(self):
+        """Incremental mode: brings the cleaned dataset saved at self.dataset up to date with the 
+        sales files, which are cumulative exports (e.g. 2024_Sales_as_of_Oct03.csv). The dataset is 
+        saved as part files, one for each update that found new rows, and a manifest 
+        (self.dataset + '.json') with the fingerprint, encoding and marks (see file_marks) of every 
+        sales file read so far.
+
+        Sales files that have not changed are skipped. A file that starts with the same bytes as one 
+        read before (the same export with rows added at the end, or a later export of it) is only 
+        parsed from where that read stopped. Other files are read whole, and only rows whose 
+        purchase_key was not seen before are kept. The new rows are cleaned and saved as a new part, 
+        so an update costs in proportion to the new sales. The dataset is rebuilt from scratch if 
+        the cleaning code, calendar or options changed.
+        """
+        manifest = self._dataset_manifest()
+        parts, sources = manifest['parts'], manifest['files']
+        saved = [read_frame(self._dataset_part(part['name'])) for part in parts if part['rows']]
+        total_sales = concat_frames(saved) if saved else None
+        del saved
+        previous_rows = 0 if total_sales is None else len(total_sales)
+
+        # where to start reading each sales file, None if it has not changed
+        starts, encodings = {}, {}
+        for path in self.sales if all(os.path.exists(path) for path in self.sales) else []:
+            fingerprint = file_fingerprint(path)
+            source = sources.get(fingerprint['path'])
+            if source is not None and (source['size'], source['mtime']) == (fingerprint['size'], fingerprint['mtime']):
+                starts[path], encodings[path] = None, source['encoding']
+            else:
+                starts[path], encoding = self._resume_point(path, sources.values())
+                if encoding is not None:
+                    encodings[path] = encoding
+
+        if not self._scan_sales(encodings):
+            self.total_sales = pd.DataFrame() if total_sales is None else total_sales
+            return
+
+        seen = [np.load(self._dataset_part(part['name']) + '.keys.npy') for part in parts] if any(
+            start is not None for start in starts.values()) else []
+        new_sales, new_hashes = [], []
+        for season_file in self.season_files:
+            start = starts[season_file.path]
+            if start is None:
+                continue
+            fingerprint = file_fingerprint(season_file.path)
+            sales = next(self._read_season(season_file, start = start))
+            hashes = row_hashes(sales)
+            earlier = np.concatenate(seen + new_hashes) if seen or new_hashes else None
+            if start == 0:
+                # the whole file was read, so keep only the rows not seen before
+                keys = purchase_keys(hashes = hashes)
+                is_new = ~keys.isin(purchase_keys(hashes = pd.Series(earlier)) if earlier is not None else [])
+                sales, hashes, keys = _keep_rows(sales, is_new), hashes[is_new], keys[is_new]
+            else:
+                keys = purchase_keys(hashes = hashes, seen = earlier)
+            new_hashes.append(hashes.to_numpy())
+            new_sales.append(self._clean(_add_columns(sales, {'purchase_key': keys.to_numpy()})))
+            del sales
+            sources[fingerprint['path']] = {**fingerprint, 'encoding': season_file.encoding,
+                                            **file_marks(season_file.path, fingerprint['size'])}
+
+        if new_hashes and sum(len(hashes) for hashes in new_hashes):
+            new_sales = concat_frames(new_sales)
+            part = f"part-{max([int(part['name'][5:]) for part in parts], default = -1) + 1:05d}"
+            if len(new_sales):
+                write_frame(new_sales, self._dataset_part(part))
+            np.save(self._dataset_part(part) + '.keys.npy', np.concatenate(new_hashes))
+            parts.append({'name': part, 'rows': len(new_sales)})
+            total_sales = new_sales if total_sales is None else concat_frames([total_sales, new_sales])
+        del new_sales
+        if total_sales is None:
+            total_sales = pd.DataFrame()
+
+        if len(parts) > DATASET_MAX_PARTS:
+            # merge the parts, so loading the dataset does not slow down as updates pile up
+            hashes = np.concatenate([np.load(self._dataset_part(part['name']) + '.keys.npy') for part in parts])
+            part = f"part-{int(parts[-1]['name'][5:]) + 1:05d}"
+            write_frame(total_sales, self._dataset_part(part))
+            np.save(self._dataset_part(part) + '.keys.npy', hashes)
+            self._remove_dataset_parts(parts)
+            parts = [{'name': part, 'rows': len(total_sales)}]
+
+        manifest.update(rows = len(total_sales), parts = parts, files = sources)
+        with open(self.dataset + '.json', 'w') as file:
+            json.dump(manifest, file)
+
+        if not total_sales.empty:
+            # an added season can change how the seasons are numbered
+            total_sales['year'] = total_sales['season'].rank(method = 'dense').astype('int64') - 1
+        if self.compact and not total_sales.empty:
+            total_sales = self._run_stage('compact', self._compact, total_sales)
+        self.total_sales = total_sales
+        self.new_rows = len(total_sales) - previous_rows
+        if self.new_rows:
+            print(f"Added {self.new_rows} new sales rows to {self.dataset}")
+
+
+    def _dataset_manifest(self) -> dict:
+        """Loads the manifest of the incremental dataset. A new one is started (and the old parts 
+        removed) when there is none, or the cleaning code, calendar or options changed.
 
-            # create a new column for gametype: regular, playoff, cup
-            self.total_sales['game_type'] = self.total_sales['event_name'].apply(self._set_gametype) 
+        Return:
+            dict: version, rows, parts (name and cleaned rows of each) and files (path -> fingerprint, 
+            encoding and file_marks of each sales file read so far)
+        """
+        version = self._code_version()
+        os.makedirs(os.path.dirname(os.path.abspath(self.dataset)), exist_ok = True)
+        if os.path.exists(self.dataset + '.json'):
+            with open(self.dataset + '.json') as file:
+                manifest = json.load(file)
+            if manifest.get('version') == version:
+                return manifest
+            self._remove_dataset_parts(manifest.get('parts', []))
+        return {'version': version, 'rows': 0, 'parts': [], 'files': {}}
 
-            # takes the first five of the event_code of zipcode 
-            self.total_sales['cleaned_zip'] = self.total_sales['zip'].apply(self._cleaning_zipcode)
 
-            # this converts the cleaned zipcode to an integer to determine range for state 
-            # and creates a column for zipcode as an integer
-            self.total_sales['zip_as_int'] = self.total_sales['cleaned_zip'].apply(self._zip_To_Integer)
+    def _dataset_part(self, name: str) -> str:
+        """Returns the path of a part of the incremental dataset (without the file extension)."""
+        return f"{self.dataset}.{name}"
 
-            # correct leading zeroe in zipcode
-            self.total_sales['zip_as_zip'] = self.total_sales['zip_as_int'].apply(self.fixZero)
 
-            # create a column for purchae state 
-            self.total_sales['purchase_state'] = self.total_sales['zip_as_int'].apply(self._determining_state)
+    def _remove_dataset_parts(self, parts: list):
+        """Deletes the files of parts of the incremental dataset."""
+        for part in parts:
+            for path in (frame_path(self._dataset_part(part['name'])), self._dataset_part(part['name']) + '.keys.npy'):
+                if os.path.exists(path):
+                    os.remove(path)
 
-            # create the in or out of state column
-            self.total_sales['In_or_Out'] = self.total_sales['purchase_state'].apply(self._PA_or_no)
 
-            self.total_sales['purchase_abbreviations'] = self.total_sales['purchase_state'].apply(self._purchase_state_abbreviation)
+    def _resume_point(self, path: str, sources) -> tuple:
+        """Finds where to start reading a sales file that changed: the end of the longest file 
+        read before that it starts with (see file_marks), so only the rows added since are parsed.
+
+        Arg:
+            path (str): sales file
+            sources: manifest records of the sales files read before
+
+        Return:
+            tuple: byte offset to read from (0 for the whole file), and the encoding of the file 
+            (None if it has to be checked)
+        """
+        for source in sorted(sources, key = lambda source: source['offset'], reverse = True):
+            marks = file_marks(path, source['offset'])
+            if marks is None or (marks['head'], marks['tail']) != (source['head'], source['tail']):
+                continue
+            # rows added to a utf-8 file could still make it latin1, which needs a full read
+            if source['encoding'] == 'utf-8' and detect_encoding(path, start = source['offset']) != 'utf-8':
+                return 0, None
+            return source['offset'], source['encoding']
+        return 0, None
+
+
+    def _clean(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Runs every cleaning step on raw sales data. This is used on the whole dataset,
+        or on one chunk at a time when streaming.
+
+        Arg:
+            sales (pd.DataFrame): raw sales data with season and year columns
+
+        Return:
+            pd.DataFrame: cleaned sales data
+        """
+        # the row filters run first, each as soon as the column it needs exists, 
+        # so the other steps only work on the rows that are kept
+        for name, column, row_filter in self._row_filters():
+            sales = self._derive(sales, column)
+            sales = self._run_stage(name, row_filter, sales)
 
-            self.total_sales['opponent'] = self.total_sales['event_name'].apply(self._opponent)
+        if self.lazy:
+            # the rest of the derived columns are made when first used
+            return sales
 
-            self.total_sales['opponent_tate'] = self.total_sales['event_name'].apply(self._opponent_tate)
+        # create columns for gametype (regular, playoff, cup), opponent, opponent state 
+        # and date of the game from the season calendar
+        sales = self._derive(sales, 'game_type')
 
-            # drop column we arent uing 
-            self._drop_column()
+        # takes the first five numbers of the zipcode, and creates columns for the zipcode 
+        # as an integer (to determine range for state) and with leading zeroes corrected
+        sales = self._derive(sales, 'cleaned_zip')
 
-            # create a column for date of the game 
-            self.total_sales['game_date'] = self.total_sales['event_name'].apply(self._game_date)
+        # create columns for purchase state, state abbreviation and in or out of state
+        sales = self._derive(sales, 'purchase_state')
 
-            # changing purchae date to datetime format 
-            self.total_sales['purchae_date'] = self.total_sales['add_datetime'].apply(self._timetamp_fix)
+        # changing purchase date to datetime format 
+        sales = self._derive(sales, 'purchase_date')
 
-            self.total_sales.apply(self._timetamp_two_fix)
-            
+        # adding column for how far out ticket was purchased
+        sales = self._derive(sales, 'days_out')
 
-            # adding column for how far out ticket wa purchaed
-            self.total_sales['day_out'] = self.total_sales.apply(self._day_out, axi = 1)
+        # group ticket types into the sales team's categories
+        sales = self._derive(sales, 'updated_ticket_type')
 
-            # keep only the entrie from the regular eaon, drop playoff and cup game 
-            self.total_sales = self._regular_eaon()
+        # key for the buyer, to match the same purchaser across games and seasons
+        sales = self._derive(sales, 'purchaser_key')
 
-            self.total_sales['updated_ticket_type'] = self.total_sales['ticket_type'].apply(self._ticket_type)
+        return sales
 
-            self.total_sales['imple_ticket_type'] = self.total_sales['updated_ticket_type'].apply(self.impler_ticket_type)
 
+    def _row_filters(self) -> list:
+        """Returns the row filters chosen when the reader was made, cheapest first, as 
+        (name, column the filter needs, filter method).
+        """
+        filters = []
+        if self.regular_season:
+            # keep only the entries from the regular season, drop playoff and cup games 
+            filters.append(('regular season', 'event_name', self._regular_season))
+        if self.drop_bulk:
             # drop the Tix, Vet and Optimal Ticketing 
-            # self.total_sales = self._ticket_companie()
+            filters.append(('ticket companies', 'owner_name', self._ticket_companies))
+        if self.purchase_dates is not None:
+            filters.append(('purchase dates', 'purchase_date', self._purchase_dates))
+        return filters
 
 
-    def _concatenate_sales(self):
-        """This will concatenate the 2023 and 2024 sales data and will create a binary column
-        called year.
-        """
-        if os.path.exists(self.sales23) and os.path.exists(self.sales24):
-            sales23 = pd.read_csv(self.sales23)
-            sales24 = pd.read_csv(self.sales24, encoding = 'latin1')
-            sales23['year'] = 0 
-            sales24['year'] = 1
-            self.total_sales = pd.concat([sales23, sales24], ignore_index = True)
-        else:
-            print("One or both sales files are missing.")
-            self.total_sales = pd.DataFrame()
+    def __getstate__(self) -> dict:
+        """Leaves the loaded sales and the on_stage hook out when the reader is sent to a worker 
+        process. Workers only need the reader's options."""
+        state = self.__dict__.copy()
+        state['total_sales'] = None
+        state['on_stage'] = None
+        state['_query'] = None
+        state['_in_worker'] = True
+        return state
+
 
+    def _run_stage(self, name: str, stage, data):
+        """Runs one step of the ingest. When profiling, the wall time and rows in and out of the 
+        step are recorded in stage_report. Otherwise the step is just called. 
 
-    def _set_gametype(self, event_code: zip) -> zip:
-        """This will loop through the event code to classify a game as regular, playoff, or cup. 
-        The value will be stored in a new column called "game_type".
+        With trace_memory, the step's peak memory is recorded instead of its wall time (see 
+        _traced_stage).
 
         Arg:
-            event_code (zip): event code based on the date of the game
+            name (str): name of the step
+            stage (function): the step, called with data
+            data: input of the step (usually a pd.DataFrame)
 
         Return:
-            zip: type of game (cup, playoff, or regular season)
+            the output of the step
         """
+        if not self.profile:
+            return stage(data)
 
-        regularSeason23 = ['23RH0324', '23RH0415', '23RH0513', '23RH0520', '23RH0603',
-        '23RH0610', '23RH0624', '23RH0701', '23RH0708', '23RH0715',
-        '23RH0726', '23RH0729', '23RH0805', '23RH0812', '23RH0909',
-        '23RH0923', '23RH0930', '23RH0425']
+        if self.trace_memory:
+            result, seconds, peak = self._traced_stage(stage, data)
+        else:
+            start = time.perf_counter()
+            result = stage(data)
+            seconds, peak = time.perf_counter() - start, None
 
-        playoff23 = ['23RHPL1']
+        self._record_stage({'stage': name, 'source': self._source, 'seconds': seconds,
+                            'rows_in': _row_count(data), 'rows_out': _row_count(result), 'peak_memory': peak})
+        return result
 
-        cup23 = ['23RHCUP5']
 
-        regularSeason24 = ['24RH0316', '24RH0406', '24RH0427', '24RH0504', '24RH0518',
-        '24RH0601', '24RH0619', '24RH0706', '24RH0713', '24RH0720',
-        '24RH0727', '24RH0810', '24RH0817', '24RH0907', '24RH0928',
-        '24RH1012', '24RH1026']
+    def _traced_stage(self, stage, data) -> tuple:
+        """Runs one step of the ingest while tracing its memory. Peak memory adds up the step's 
+        peak traced by tracemalloc (Python objects and numpy arrays) and its peak in pyarrow's 
+        memory pool (arrow backed columns, which tracemalloc does not see). 
 
-        playoff24 = []
+        Neither peak is reset, so a tracemalloc session the caller started is left alone. Each 
+        peak is exact when the step raises it, and otherwise the memory the step still holds at 
+        the end is counted.
 
-        cup24 = ['24RHCUP4']
+        Arg:
+            stage (function): the step, called with data
+            data: input of the step
 
-        if (event_code in regularSeason23) or (event_code in regularSeason24):
-            return "regular"
-        elif (event_code in playoff23) or (event_code in playoff24):
-            return "playoff"
-        elif (event_code in cup23) or (event_code in cup24):
-            return "cup"
+        Return:
+            tuple: the output of the step, None for the wall time (not measured while tracing), and 
+            the peak memory in bytes
+        """
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        memory_before, peak_before = tracemalloc.get_traced_memory()
+        arrow_before, arrow_peak_before = _arrow_memory(_arrow_memory_pool())
+        result = stage(data)
+        memory_after, peak_after = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+        # pyarrow can be imported by the step itself (e.g. the first read with the pyarrow engine)
+        arrow_after, arrow_peak = _arrow_memory(_arrow_memory_pool())
+        peak = max(0, (peak_after if peak_after > peak_before else memory_after) - memory_before)
+        peak += max(0, (arrow_peak if arrow_peak > arrow_peak_before else arrow_after) - arrow_before)
+        return result, None, peak
+
+
+    def _record_stage(self, record: dict):
+        """Adds a stage record to stage_report, and passes it to the on_stage hook and the logger."""
+        self.stage_report.append(record)
+        if record['peak_memory'] is None:
+            logger.info("%(stage)s: %(seconds).3f s, %(rows_in)s -> %(rows_out)s rows", record)
+        else:
+            logger.info("%(stage)s: %(rows_in)s -> %(rows_out)s rows, peak %(peak_memory)d bytes", record)
+        if self.on_stage is not None:
+            self.on_stage(record)
+
+
+    def __getitem__(self, column: str) -> pd.Series:
+        """Returns a column of total_sales, creating it first if it is a derived column 
+        that has not been made yet (see require)."""
+        return self.require(column)[column]
 
-        
-    def _cleaning_zipcodes(self, zip: zip) -> zip:
-        """If the value is a zipcode, the first five or less numbers will be extracted.
-        If not, "nan" will be returned.
-        The original zipcode column contained zipcodes with an invalid 
-        number of numbers, contained letters, or contained special characters.
+
+    def require(self, *columns) -> pd.DataFrame:
+        """Makes sure total_sales has these columns. Derived columns that are missing are created, 
+        along with any columns they need (e.g. purchase_state needs zip_as_int), and kept for 
+        later. In lazy mode this is how derived columns get created.
 
         Arg:
-            zip (zip): zipcode as a string
+            *columns (str): column names
+
+        Raise:
+            KeyError: if a column is not in total_sales and can not be derived
+
+        Return:
+            pd.DataFrame: total_sales
+        """
+        for column in columns:
+            self.total_sales = self._derive(self.total_sales, column)
+        return self.total_sales
+
+
+    @property
+    def query(self) -> SalesIndex:
+        """Indexed lookups on total_sales, e.g. 
+        reader.query.lookup(event_name = '24RH0720', days_out = (7, 30)). The indexes are built 
+        the first time each column is looked up, and rows appended to total_sales are added to 
+        them the next time query is used.
 
         Return:
-            zip: zipcode with no more than five numbers
+            SalesIndex: indexes over total_sales
         """
-        if pd.isna(zip):
-            return "nan"
-        zip = zip(zip)
-        zip = zip[:5]
-        return zip
+        if self._query is None:
+            self._query = SalesIndex(self.total_sales, self.require)
+        return self._query.sync(self.total_sales)
+
+
+    def apply_sharded(self, func, *columns, by: str = 'event_name', workers: int = None) -> pd.Series:
+        """Runs a Python row function (e.g. a custom classifier, or _opponent and _set_gametype) 
+        over total_sales on every core. The rows are split into shards by the by column, so each 
+        game stays in one shard, the shards run in a process pool, and the results are put back 
+        in the original row order. For example:
+            reader.total_sales['opponent'] = reader.apply_sharded(reader._opponent, 'event_name')
 
-    def fixZeros(self, zip: zip) -> zip:
-        """This adds additional zeroes to the beginning of zipcode to have proper five digit zipcodes. 
-        Because the zipcodes were stored as an integer, leading zeroes were originally removed.
+        The function is sent to the worker processes, so it must be defined at the top of a 
+        module or be a Reader method (the reader is sent without its sales, see __getstate__). 
+        Functions that can not be sent, and fewer than SHARD_MIN_ROWS rows, run in this process.
 
         Arg:
-            zip (zip): zipcode with five or less numbers
+            func (function): called with the values of the columns for every row
+            *columns (str): columns passed to the function, in order
+            by (str, optional): column to shard by. Defaults to 'event_name'.
+            workers (int, optional): number of processes. Defaults to the reader's workers 
+            (or one per core).
 
         Return:
-            zip: zipcode with five numbers
+            pd.Series: result of the function for every row of total_sales
         """
+        sales = self.require(*columns, by)
+        rows = sales[list(columns)]
+        workers = workers or self.workers or os.cpu_count() or 1
+        try:
+            pickle.dumps(func)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            print(f"{getattr(func, '__name__', func)} can not be sent to worker processes, running it in this process")
+            workers = 1
+
+        if workers > 1 and len(rows) >= SHARD_MIN_ROWS:
+            shards = shard_rows(sales[by], workers)
+            with ProcessPoolExecutor(max_workers = len(shards)) as pool:
+                shard_results = pool.map(_apply_rows, repeat(func), [rows.iloc[shard] for shard in shards])
+                results = np.empty(len(rows), dtype = object)
+                for shard, shard_result in zip(shards, shard_results):
+                    results[shard] = shard_result
+        else:
+            results = _apply_rows(func, rows)
+        return pd.Series(results, index = sales.index).infer_objects()
 
-        zip = zip(zip)
-        if zip == "nan":
-            return "nan"
-        if len(zip) == 5:
-            return zip
-        if len(zip) == 4:
-            return("0" + zip)
-        if len(zip) == 3:
-            return("00" + zip)
-        if zip == "0":
-            return "nan"
 
- 
-    def _contains_A_Letter(self, zip: str, exclude_event_code = 'nan') -> bool:
-        """This loops through entries letter by letter to determine if there is an alphabetic letter.
+    def _derive(self, sales: pd.DataFrame, column: str) -> pd.DataFrame:
+        """Adds a derived column to the sales data if it is missing, first adding whatever 
+        columns it needs.
 
         Arg:
-            (zip): zipcode
-            exclude_event_code (zip, optional): If the value is nan, the function does not check for alphabetic letters.
-            Defaults to 'nan'.
+            sales (pd.DataFrame): sales data
+            column (str): column name
+
+        Raise:
+            KeyError: if the column is missing and can not be derived
 
         Return:
-            bool: True if alphabetic letter is found, otherwise False 
+            pd.DataFrame: sales data with the column
         """
-        found = False
-        for x in zip:
-            if x.isalpha():
-                found = True
-        return found 
-    
+        if column in sales.columns:
+            return sales
+        stage = DERIVED_COLUMNS.get(column)
+        if stage is None:
+            raise KeyError(f"{column} is not a column of the sales data")
+        for needed in stage.needs:
+            sales = self._derive(sales, needed)
+        sales = self._run_stage(stage.name, getattr(self, stage.method), sales)
+        if column not in sales.columns:
+            # e.g. days_out_bucket is only made when the reader has lead_time_windows
+            raise KeyError(f"{column} is not made with this reader's options")
+        return sales
+
+
+    def _scan_sales(self, encodings: dict = None) -> bool:
+        """Works out the encoding, columns, season and year of every sales file before any of 
+        them are loaded, and warns if the files do not have the same columns. The year column 
+        numbers the seasons from 0 in order (so 2023 is 0 and 2024 is 1).
 
+        Arg:
+            encodings (dict, optional): path -> encoding of files it is already known for, 
+            which are not checked again. Defaults to None.
+
+        Return:
+            bool: False if no sales files were given or one is missing
+        """
+        missing = [path for path in self.sales if not os.path.exists(path)]
+        if missing or not self.sales:
+            print(f"Sales files are missing: {', '.join(missing) or 'none were given'}")
+            return False
 
-    def _zip_To_Integer(self, value, exclude_value = 'nan') -> bool:
-        """If the value of the event_code is a zipcode, the zipcode is converted to an integer.
-        If the value is not a zipcode ("nan"), nothing is changed. 
+        known = encodings or {}
+        encodings = [known[path] if path in known else detect_encoding(path) for path in self.sales]
+        schemas = [sales_columns(path, encoding) for path, encoding in zip(self.sales, encodings)]
+        check_schema_drift(self.sales, schemas)
+        seasons = [file_season(path, encoding) for path, encoding in zip(self.sales, encodings)]
+        years = {season: year for year, season in enumerate(sorted(set(seasons)))}
+
+        self.season_files = [SeasonFile(path, encoding, usecols, dtype, season, years[season])
+                             for path, encoding, (usecols, dtype), season
+                             in zip(self.sales, encodings, schemas, seasons)]
+        return True
+
+
+    def _read_season(self, season_file, chunksize = None, start = 0):
+        """Reads one season's sales file, adding the season and year columns.
 
         Arg:
-            value (zip): zipode as a string value
-            exclude_value (zip, optional): _decription_. Default to 'nan'.
+            season_file (SeasonFile): the file to read
+            chunksize (int, optional): if given, the file is read this many rows at a time. Defaults to None.
+            start (int, optional): only read the rows from this byte offset on (see file_tail). Defaults to 0.
 
         Return:
-            value: zipcode as an integer value
-        """
-        found = False
-        for x in value:
-            if x.ialpha():
-                found = True
-        if found == True: 
-            return exclude_value 
-        else:
-            return int(value)
+            iterator of pd.DataFrame: the whole file, or its chunks in order
+        """
+        source = season_file.path if start == 0 else file_tail(season_file.path, start)
+        sales = read_sales_csv(source, season_file.encoding, season_file.usecols, season_file.dtype,
+                               self.csv_engine, chunksize)
+        for chunk in ([sales] if chunksize is None else sales):
+            chunk['season'] = season_file.season
+            chunk['year'] = season_file.year
+            yield chunk
+
 
-       
-    def _determining_state(self, zip: int) -> str:
-        """This takes in a zipcode and returns the state depending on what range the zipcode is in. 
+    def _load_season(self, season_file) -> pd.DataFrame:
+        """Reads and cleans one whole season file. This runs in a worker process when 
+        several files are loaded in parallel.
 
         Arg:
-            zip (int): zipcode as an integer value
+            season_file (SeasonFile): the file to load
 
         Return:
-            str: state name 
-        """
-        if zip != "nan":
-            if zip in range (99501,99951):
-                return("Alaska")
-            elif zip in range(35004,36926):
-                return "Alabama"
-            elif (zip in range(71601,72960)) or zip == 75502:
-                return "Arkanas"
-            elif zip in range(85001,86557):
-                return "Arizona"
-            elif zip in range(90001,96162):
-                return "California"
-            elif zip in range(80001,81659):
-                return "Colorado"
-            elif (zip in range(6001,6390)) or (zip in range(6401,6929)):
-                return "Connecticut"
-            elif (zip in range(20001,20040)) or (zip in range(20042,20600)) or (zip == 20799):
-                return "District of Columbia"
-            elif zip in range(19701, 19981):
-                return "Delaware"
-            elif zip in range(32004,34998):
-                return "Florida"
-            elif (zip in range(30001,32000)) or (zip == 39901):
-                return "Georgia"
-            elif zip in range(96701,96899):
-                return "Hawaii"
-            elif (zip in range(50001,52809)) or (zip in range(68119, 68121)):
-                return "Iowa"
-            elif zip in range(83201,83877):
-                return "Idaho"
-            elif zip in range(60001,63000):
-                return "Illinois"
-            elif zip in range(46001,47998):
-                return "Indiana"
-            elif zip in range(66002,67955):
-                return "Kansas"
-            elif zip in range(40003,42789):
-                return "Kentucky"
-            elif (zip in range(70001,71233)) or (zip in range(71234,71498)):
-                return "Louisiana"
-            elif (zip in range(1001,2792)) or (zip in range(5501,5545)):
-                return "Massachuetts"
-            elif (zip == 20331) or (zip in range(20335,20798)) or (zip in range(20812,21931)):
-                return "Maryland"
-            elif zip in range(3901,4993):
-                return "Maine"
-            elif zip in range(48001,49972):
-                return "Michigan"
-            elif zip in range(55001,56764):
-                return "Minneota"
-            elif (zip in range(38601,39777)) or (zip == 71233):
-                return "Mississippi"
-            elif zip in range(59001,59938):
-                return "Montana"
-            elif zip in range(27006,28910):
-                return "North Carolina"
-            elif zip in range(58001,58857):
-                return "North Dakota"
-            elif (zip in range(68001,68119)) or (zip in range(68122, 69368)):
-                return "Nebraska"
-            elif zip in range(3031,3898):
-                return "New Hampshire"
-            elif zip in range(7001,8990):
-                return "New Jersey"
-            elif zip in range(87001,88442):
-                return "New Mexico"
-            elif zip in range(88901,89884):
-                return "Nevada"
-            elif (zip in range(10001,14976)) or (zip == 6390):
-                return "New York"
-            elif zip in range(43001,46000):
-                return "Ohio"
-            elif (zip in range(73001,73200)) or (zip in range(73401,74967)):
-                return "Oklahoma"
-            elif zip in range(97001,97921):
-                return "Oregon"
-            elif zip in range(15001,19641):
-                return "Pennsylvania"
-            elif zip in range(2801,2941):
-                return "Rhode Island"
-            elif zip in range(29001,29949):
-                return "South Carolina"
-            elif zip in range(57001,57800):
-                return "South Dakota"
-            elif zip in range(37010,38590):
-                return "Tennessee"
-            elif (zip in range(75001,75502)) or (zip in range(75503,80000)) or (zip in range(88510,88590)) or (zip == 73301):
-                return "Texas"
-            elif zip in range(84001,84785):
-                return "Utah"
-            elif (zip in range(20040,20042)) or (zip in range(20040, 20168)) or (zip == 20042) or (zip in range(22001,24659)):
-                return "Virginia"
-            elif (zip in range(5001,5495)) or (zip in range(5601,5908)):
-                return "Vermont"
-            elif zip in range(98001,99404):
-                return "Washington"
-            elif zip in range(53001,54991):
-                return "Wisconsin"
-            elif zip in range(24701,26887):
-                return "West Virginia"
-            elif zip in range(82001,83129):
-                return "Wyoming"
+            tuple: cleaned sales for the season (pd.DataFrame), and the stage_report 
+            records made while loading it (list, empty unless profiling)
+        """
+        first_record = len(self.stage_report)
+        self._source = os.path.basename(season_file.path)
+        sales = self._run_stage('read', lambda season_file: next(self._read_season(season_file)), season_file)
+        sales = self._clean(sales)
+        return sales, self.stage_report[first_record:]
 
-    
 
-    def _PA_or_no(self, state: str) -> str:
-        """This function takes in a state name and returns in state or out of state based on if the state name is Pennsylvania.
+    def _load_season_to_file(self, season_file, path: str) -> list:
+        """Loads one season in a worker process (see _load_season) and pickles the cleaned sales 
+        to a file. Unpickling a file in the main process only holds the frame, while a frame sent 
+        back through the process pool is held there as received bytes, a copy of them and the 
+        frame at the same time.
 
         Arg:
-            state (str): state name
+            season_file (SeasonFile): the file to load
+            path (str): file to pickle the cleaned sales to
 
         Return:
-            str: in state or out of state determination
+            list: the stage_report records made while loading the season
         """
-        if pd.isna(state):
-            return "nan"
-        else: 
-            if state == "Pennsylvania":
-                return "In State"
-            else:
-                return "Out of State"
+        sales, records = self._load_season(season_file)
+        sales.to_pickle(path, protocol = pickle.HIGHEST_PROTOCOL)
+        return records
 
 
-    def _purchase_state_abbreviations(self, state: str) -> str:
-        """Thi function take in a state and return state abbreviation baed on state name.
+    def iter_sales(self):
+        """Streams the cleaned sales one chunk at a time, so the whole dataset never has to 
+        be held in memory. Each chunk of chunksize raw rows is read and cleaned on its own.
+
+        Return:
+            iterator of pd.DataFrame: cleaned sales chunks
+        """
+        if not self._scan_sales():
+            return
+        for season_file in self.season_files:
+            for chunk in self._read_season(season_file, self.chunksize or STREAM_CHUNKSIZE):
+                chunk = self._clean(chunk)
+                if self.compact:
+                    chunk = compact_frame(chunk)
+                yield chunk
+
+
+    def write_sales(self, path: str) -> int:
+        """Cleans the sales one chunk at a time and writes them to a csv file as it goes.
 
         Arg:
-            state (str): state name
+            path (str): csv file to write the cleaned sales to
 
         Return:
-            str: state name abbreviation
-        """
-        if state == "Pennsylvania":
-            return "PA"
-        elif state == "Florida":
-            return "FL"
-        elif state == "Ohio":
-            return "OH"
-        elif state == "Arizona":
-            return "AZ"
-        elif state == "West Virginia":
-            return "WV"
-        elif state == "Michigan":
-            return "MI"
-        elif state == "New York":
-            return "NY"
-        elif state == "New Jerey":
-            return "NJ"
-        elif state == "Virginia":
-            return "VA"
-        elif state == "Maryland":
-            return "MD"
-        elif state == "Texas":
-            return "TX"
-        elif state == "California":
-            return "CA"
-        elif state == "North Carolina":
-            return "NC"
-        elif state == "District of Columbia":
-            return "DC"
-        elif state == "Illinois":
-            return "IL"
-        elif state == "Kentucky":
-            return "KY"
-        elif state == "Indiana":
-            return "IN"
-        elif state == "Georgia":
-            return "GA"
-        elif state == "South Dakota":
-            return "SD"
-        elif state == "Massachuettss":
-            return "MA"
-        elif state == "Delaware":
-            return "DE"
-        elif state == "Colorado":
-            return "CO"
-        elif state == "South Carolina":
-            return "SC"
-        elif state == "Tennessee":
-            return "TN"
-        elif state == "Connecticut":
-            return "CT"
-        elif state == "Wisconin":
-            return "WI"
-        elif state == "Utah":
-            return "UT"
-        elif state == "Washington":
-            return "WA"
-        elif state == "Oregon":
-            return "OR"
-        elif state == "Alabama":
-            return "AL"
-        elif state == "Louisiana":
-            return "LA"
-        elif state == "New Mexico":
-            return "NM"
-        elif state == "Iowa":
-            return "IA"
-        elif state == "New Hampshire":
-            return "NH"
-        elif state == "Minneota":
-            return "MN"
-        elif state == "Vermont":
-            return "VT"
-        elif state == "Oklahoma":
-            return "OK"
-        elif state == "Kanas":
-            return "KS"
-        elif state == "Idaho":
-            return "ID"
-        elif state == "North Dakota":
-            return "ND"
-        elif state == "Mississippi":
-            return "MS"
-        elif state == "Maine":
-            return "ME"
-        elif state == "Rhode Island":
-            return "RI"
-        elif state == "Arkanas":
-            return "AR"
-        elif state == "Alaka":
-            return "AK"
-        elif state == "Hawaii":
-            return "HI"
-        elif state == "Nevada":
-            return "NV"
-        elif state == "Iowa":
-            return "IA"
-        elif state == "Nebraska":
-            return "NE"
+            int: number of cleaned rows written
+        """
+        rows = 0
+        for chunk in self.iter_sales():
+            chunk.to_csv(path, mode = 'w' if rows == 0 else 'a', header = rows == 0, index = False)
+            rows += len(chunk)
+        return rows
+
+
+    def _concatenate_sales(self):
+        """This loads and cleans every season file, in parallel worker processes when there is 
+        more than one, and concatenates the cleaned seasons at the end.
+        """
+        if not self._scan_sales():
+            self.total_sales = pd.DataFrame()
+            return
+
+        workers = min(self.workers or os.cpu_count() or 1, len(self.season_files))
+        if workers > 1:
+            with tempfile.TemporaryDirectory() as folder:
+                paths = [os.path.join(folder, f'season-{number}.pkl') for number in range(len(self.season_files))]
+                with ProcessPoolExecutor(max_workers = workers) as pool:
+                    loaded = list(pool.map(self._load_season_to_file, self.season_files, paths))
+                # stages that ran in a worker process are recorded here
+                for records in loaded:
+                    for record in records:
+                        self._record_stage(record)
+                seasons = [pd.read_pickle(path) for path in paths]
+            for sales in seasons:
+                if 'updated_ticket_type' in sales.columns:
+                    self._note_unmapped_ticket_types(
+                        sales['ticket_type'][sales['updated_ticket_type'].isna()].dropna().unique())
         else:
-            return "unknown"
+            loaded = [self._load_season(season_file) for season_file in self.season_files]
+            seasons = [sales for sales, _ in loaded]
+            del loaded
+        self._source = None
+        self.total_sales = self._run_stage('concatenate', concat_frames, seasons)
+
 
+    def _join_calendar(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Joins the season calendar onto the sales data by event code, creating the game_type,
+        opponent, opponent_state and game_date columns together. Only the distinct event codes 
+        are looked up, then the results are spread back out to every purchase.
+        """
+        return _add_columns(sales, map_distinct(sales['event_name'], self.calendar))
 
 
+    def _set_gametype(self, event_code: str) -> str:
+        """This looks up an event code in the season calendar to classify a game as regular, playoff, or cup. 
+
+        Arg:
+            event_code (str): event code based on the date of the game
+
+        Return:
+            str: type of game (cup, playoff, or regular season)
+        """
+        return self.calendar['game_type'].get(event_code)
+
+        
+    def _clean_zipcodes(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Cleans the zipcode column, creating the cleaned_zip, zip_as_int and zip_as_zip columns.
+        The original zipcode column contained zipcodes with an invalid number of numbers, 
+        contained letters, or contained special characters. These have no zip_as_int or zip_as_zip.
+        """
+        return _add_columns(sales, clean_zipcodes(sales['zip']))
+
+
+    def _purchase_states(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Looks up the purchase state, state abbreviation and in or out of state
+        determination for every zipcode in one batched pass over the zip_as_int column.
+        """
+        return _add_columns(sales, lookup_zip_states(sales['zip_as_int']))
+
 
-    
     def _opponent(self, event_code: str) -> str:
         """This function takes in an event code and returns who the opponent is.
 
@@ -454,136 +1505,45 @@ class Reader():
         Return:
             str: opponent name
         """
-        if (event_code == "23RH0324") or (event_code == "24RH0504"):
-            return "Miami"
-        elif event_code == "23RH0415":
-            return "Rio Grande Valley"
-        elif (event_code == "23RH0513") or (event_code == "24RH0928"):
-            return "Birmingham"
-        elif event_code == "23RH0520":
-            return "Las Vegas"
-        elif event_code == "23RH0415":
-            return "Rio Grande Valley"
-        elif event_code == "23RH0603":
-            return "Pheonix"
-        elif (event_code == "23RH0610") or (event_code == "24RH1012"):
-            return "Charleston"
-        elif event_code == "23RH0624":
-            return "San Diego"
-        elif (event_code == "23RH0701") or (event_code == "24RH0619"):
-            return "Louisville"
-        elif event_code == "23RH0708":
-            return "Sacramento"
-        elif event_code == "23RH0715":
-            return "Detroit"
-        elif (event_code == "23RH0726") or (event_code == "24RH0601"):
-            return "Indy"
-        elif event_code == "23RH0729":
-            return "Memphis"
-        elif (event_code == "23RH0805") or (event_code == "24RH0406"):
-            return "Tampa Bay"
-        elif (event_code == "23RH0812") or (event_code == "24RH0720"):
-            return "Hartford"
-        elif (event_code == "23RH0909") or (event_code == "24RH0727"):
-            return "Loudon"
-        elif event_code == "23RH0923":
-            return "New Mexico"
-        elif event_code == "23RH0930":
-            return "Tulsa"
-        elif event_code == "24RH0316":
-            return "Orange County"
-        elif (event_code == "24RH0427") or (event_code == "23RHPL1"):
-            return "Detroit FC"
-        elif event_code == "24RH0518":
-            return "North Carolina"
-        elif event_code == "24RH0706":
-            return "Montery Bay"
-        elif event_code == "24RH0713":
-            return "Oakland"
-        elif event_code == "24RH0810":
-            return "San Antonio"
-        elif event_code == "24RH0817":
-            return "Colorado Springs"
-        elif event_code == "24RH0907":
-            return "Rhode Island"
-        elif event_code == "24RH1026":
-            return "El Paso"
-        elif event_code == "23RH0425":
-            return "Maryland"
-        elif (event_code == "23RHCUP5") or (event_code == "24RHCUP4"):
-            return "cup"
-
-
+        return self.calendar['opponent'].get(event_code)
 
     
     def _opponent_State(self, event_code: str) -> str:
-        """This takes in the event_code and return the state the opponent i from
+        """This takes in the event_code and returns the state the opponent is from
 
         Arg:
-            event_code (zip): event code based on the date of the game
+            event_code (str): event code based on the date of the game
 
         Return:
             str: opponent state name 
         """
-        if (event_code == "23RH0324") or (event_code == "24RH0504"):
-            return "Florida"
-        elif event_code == "23RH0415":
-            return "Texas"
-        elif (event_code == "23RH0513") or (event_code == "24RH0928"):
-            return "Alabama"
-        elif event_code == "23RH0520":
-            return "Nevada"
-        elif event_code == "23RH0415":
-            return "Texas"
-        elif event_code == "23RH0603":
-            return "Arizona"
-        elif (event_code == "23RH0610") or (event_code == "24RH1012"):
-            return "South Carolina"
-        elif event_code == "23RH0624":
-            return "California"
-        elif (event_code == "23RH0701") or (event_code == "24RH0619"):
-            return "Kentucky"
-        elif event_code == "23RH0708":
-            return "California"
-        elif event_code == "23RH0715":
-            return "Michigan"
-        elif (event_code == "23RH0726") or (event_code == "24RH0601"):
-            return "Indianapolis"
-        elif event_code == "23RH0729":
-            return "Tennessee"
-        elif (event_code == "23RH0805") or (event_code == "24RH0406"):
-            return "Florida"
-        elif (event_code == "23RH0812") or (event_code == "24RH0720"):
-            return "Connecticut"
-        elif (event_code == "23RH0909") or (event_code == "24RH0727"):
-            return "Tennessee"
-        elif event_code == "23RH0923":
-            return "New Mexico"
-        elif event_code == "23RH0930":
-            return "Oklahoma"
-        elif event_code == "24RH0316":
-            return "California"
-        elif (event_code == "24RH0427") or (event_code == "23RHPL1"):
-            return "Michigan"
-        elif event_code == "24RH0518":
-            return "North Carolina"
-        elif event_code == "24RH0706":
-            return "California"
-        elif event_code == "24RH0713":
-            return "California"
-        elif event_code == "24RH0810":
-            return "Texas"
-        elif event_code == "24RH0817":
-            return "Colorado"
-        elif event_code == "24RH0907":
-            return "Rhode Island"
-        elif event_code == "24RH1026":
-            return "Texas"
-        elif event_code == "23RH0425":
-            return "Maryland"
-        elif (event_code == "23RHCUP5") or (event_code == "24RHCUP4"):
-            return "cup"
+        return self.calendar['opponent_state'].get(event_code)
+
+
 
+    def _purchasers(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Creates the purchaser_key column from the owner names and zipcodes (see purchaser_keys)."""
+        return _add_columns(sales, {'purchaser_key': purchaser_keys(sales)})
+
+
+    def _ticket_types(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Creates the updated_ticket_type and simple_ticket_type columns by looking up each distinct 
+        ticket type in the ticket type mapping. Ticket types that are not in the mapping are left 
+        missing and reported (see unmapped_ticket_types).
+        """
+        groups = map_distinct(sales['ticket_type'], self.ticket_types)
+        unmapped = sales['ticket_type'][groups['updated_ticket_type'].isna()].dropna().unique()
+        self._note_unmapped_ticket_types(unmapped)
+        return _add_columns(sales, groups)
+
+
+    def _note_unmapped_ticket_types(self, ticket_types):
+        """Adds ticket types that are not in the mapping to unmapped_ticket_types, printing the new 
+        ones. Worker processes leave the printing to the main process."""
+        new = sorted(set(ticket_types) - self.unmapped_ticket_types)
+        self.unmapped_ticket_types.update(new)
+        if new and not self._in_worker:
+            print(f"Ticket types missing from the ticket type mapping: {', '.join(new)}")
 
 
     def _ticket_type(self, ticket: str) -> str:
@@ -595,218 +1555,100 @@ class Reader():
         Return:
             str: smaller ticket group baed on the way the sales team categorizes ticket type
         """
+        return self.ticket_types['updated_ticket_type'].get(ticket)
 
-        single_game_promo = ['Additional Staff', 'Adult $10 Ticket', 'Adult Promo', 'Comp Ticket', 
-        'Compt Ticket', 'Corporate Partner', 'Friends of the Riverhounds', 'Upgrade Grandstand',
-        'Upgrade Riverside', 'Weather Delay', 'Costco Offer']
+    def simpler_ticket_type(self, ticket: str) -> str:
+        """This takes in a ticket group from _ticket_type and returns group, single game full or other.
 
-        single_game_full = ['Adult', 'Adult A Game', 'Adult B Game', 'Adult C Game', 'Season Additional',
-        'Season Adtl. 1 Year', 'Season Adtl. 2 Year', 'Season Deposit', 'Season Steel Army Additional',
-        'Season Ticket Holder', 'Premium Single', 'Adult A+ Ticket']
-    
-        flex = ['Bonus Flex', 'Flex Academy', 'Flex Black Friday', 'Flex Cyber Monday', 'Flex Discount',
-        'Flex Fevo', 'Flex Home Opener', 'Flex New', 'Flex Package', 'Flex Renewal', 'Flex Renew',
-        'Flex Single Voucher', 'Flex Valentines Day']
-
-        other_promotion = ['Bundle Open Cup', 'Hounds Night Aht', 'May Package', 'Mothers Day', 'Ultimate Fan Pack']
-
-        container = ['Container', 'Corner Additional', 'Corner New', 'Corner Renew']
-
-        groups = ['Group $10 Ticket', 'Group Discounted', 'Group Large', 'Group New',
-        'Group Performer', 'Group Renew', 'Group Soccer', 'Group Standard', 'Group Theme',
-        'Large New','Large Renew' ]
-
-        fundraiser = ['Group $5 Donation', 'Group Fundraiser']
-
-        birthdays = ['Group Birthday']
-
-        party_deck = ['Party Deck', 'Party Deck Additional', 'Party Deck New', 'Party Deck Renew']
-
-        suite = ['Premium', 'Premium Discounted', 'Suite Additional', 'Suite Last', 'Suite New',
-        'Suite Renewal', 'Suite Renew', 'Premium New', 'Premium Additional', 'Premium Renew'] 
-
-        youth_soccer = ['Riverhounds Academy']
-
-        new_season = ['Season New 1 Year', 'Season New 2 Year', 'New 2-Year']
-
-        renew_season = ['Season Renewal 1 Year', 'Season Renewal 2 Year', 'Season Renew 1 Year',
-        'Season Renew 2 Year']
-
-        student_rush = ['Student Rush']
-
-
-        if ticket in single_game_promo:
-            return ("single game promo")
-        elif ticket in single_game_full:
-            return "single game full"
-        elif ticket in flex:
-            return "flex"
-        elif ticket in other_promotion:
-            return "other_promotion"
-        elif ticket in container:
-            return "container"
-        elif ticket in groups:
-            return "group"
-        elif ticket in fundraiser:
-            return "fundraiser"
-        elif ticket in birthdays:
-            return "birthday"
-        elif ticket in party_deck:
-            return "party deck"
-        elif ticket in suite:
-            return "suite"
-        elif ticket in youth_soccer:
-            return "youth_soccer"
-        elif ticket in new_season:
-            return "new season"
-        elif ticket in renew_season:
-            return "renew season"
-        elif ticket in student_rush:
-            return "student rush"
+        Arg:
+            ticket (str): ticket group
 
-    def simpler_ticket_type(self, ticket: str) -> str:
-        if ticket == "group":
-            return "group"
-        elif ticket == "single game full":
-            return "single game full"
-        else:
-            return "other "
+        Return:
+            str: simple ticket group
+        """
+        return self.simple_ticket_types.get(ticket, "other")
 
 
-    def _drop_column(self):
-        """Thsi drops the columns that are not relevent to the research"""
-        cols_to_drop = ['acct_id', 'price_code', 'promo_code', 'acct_rep_id', 'assoc_acct_id', 'acct_type_desc', 'add_usr']
-        self.total_sales.drop(cols_to_drop, axis = 1, inplace = True) 
+    def _compact(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Shrinks the sales data in memory. Text columns where values repeat (game_type, purchase_state, 
+        opponent, ticket types, ...) are stored as categoricals and numeric columns are downcast 
+        to the smallest type that holds their values. The memory used before and after is saved 
+        in memory_usage.
+        """
+        before = sales.memory_usage(deep = True).sum()
+        sales = compact_frame(sales)
+        after = sales.memory_usage(deep = True).sum()
+        self.memory_usage = {'before': int(before), 'after': int(after)}
+        print(f"total_sales memory: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+        return sales
+
 
-    def _game_date(self, event_code: str) -> str:
+    def _game_date(self, event_code: str) -> pd.Timestamp:
         """This takes in the game event code and returns the date of the game.
 
         Arg:
             event_code (str): event code based on the date of the game
 
         Return:
-            str: date the game was played on
-        """
-        if event_code == '23RH0324':
-            return '2023-03-24'
-        elif event_code == '23RH0415':
-            return '2023-04-15'
-        elif event_code == '23RH0513':
-            return '2023-05-13'
-        elif event_code == '23RH0520':
-            return '2023-05-20'
-        elif event_code == '23RH0603':
-            return '2023-06-03'
-        elif event_code == '23RH0610':
-            return '2023-06-10'
-        elif event_code == '23RH0624':
-            return '2023-06-24'
-        elif event_code == '23RH0701':
-            return '2023-07-01'
-        elif event_code == '23RH0708':
-            return'2023-07-08'
-        elif event_code == '23RH0715':
-            return '2023-07-15'
-        elif event_code == '23RH0726':
-            return '2023-07-26'
-        elif event_code == '23RH0729':
-            return '2023-07-29'
-        elif event_code == '23RH0805':
-            return '2023-08-05'
-        elif event_code == '23RH0812':
-            return '2023-08-12'
-        elif event_code == '23RH0909':
-            return '2023-09-09'
-        elif event_code == '23RH0923':
-            return '2023-09-23'
-        elif event_code == '23RH0930':
-            return '2023-09-30'
-        elif event_code == '23RH0425':
-            return '2023-04-25'
-        elif event_code == '24RH0316':
-            return '2024-03-16'
-        elif event_code == '24RH0406':
-            return '2024-04-06'
-        elif event_code == '24RH0427':
-            return'2024-04-27'
-        elif event_code == '24RH0504':
-            return '2024-05-04'
-        elif event_code == '24RH0518':
-            return '2024-05-18'
-        elif event_code == '24RH0601':
-            return '2024-06-01'
-        elif event_code == '24RH0619':
-            return '2024-06-19'
-        elif event_code == '24RH0706':
-            return '2024-07-06'
-
-        elif event_code == '24RH0713':
-            return '2024-07-13'
-        elif event_code == '24RH0720':
-            return '2024-07-20'
-        elif event_code == '24RH0727':
-            return'2024-07-27'
-        elif event_code == '24RH0810':
-            return '2024-08-10'
-        elif event_code == '24RH0817':
-            return '2024-08-17'
-        elif event_code == '24RH0907':
-            return '2024-09-07'
-        elif event_code == '24RH0928':
-            return '2024-09-28'
-        elif event_code == '24RH1012':
-            return '2024-10-12'
-        elif event_code == '24RH1026':
-            return '2024-10-26'
-        
-    def _timestamp_fix(self, date: str):
-        """Converts the date to month/day/year format
-
-        Arg:
-            date (str): date the game was played on
+            pd.Timestamp: date the game was played on
         """
-        date_obj = datetime.strptime(date, "%m/%d/%y")
-        return(date_obj)
-    
-    
-    def _timetamp_two_fix(self):
-        """Applies the desired format for date to the purchase date and game date columns in the dataframe"""
-        self.total_sales['purchase_date'] = pd.to_datetime(self.total_sales['purchase_date'])
-        self.total_sales['game_date'] = pd.to_datetime(self.total_sales['game_date'])
-
-    def _days_out(self, row):
-        """_summary_
-
-        Args:
-            row (_type_): _description_
-
-        Returns:
-            _type_: _description_
+        return self.calendar['game_date'].get(event_code)
+        
+    def _purchase_date(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Creates the purchase_date column by parsing the add_datetime timestamps 
+        (including the time of day) with the reader's date formats."""
+        dates = parse_timestamps(sales['add_datetime'], self.date_formats)
+        return _add_columns(sales, {'purchase_date': dates['timestamp']})
+
+    def _days_out(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """Creates the days_out column, the number of days before the game that the ticket was
+        purchased (0 for tickets bought on the day of the game), as one column subtraction.
+        Entries without a game date get a missing value. If lead time windows were given, 
+        the days_out_bucket column is created as well.
         """
-        if row is None:
-            return None
-        else:
-            return (row['purchase_date'] - row['game_date']).days
+        days_out = (sales['game_date'] - sales['purchase_date'].dt.normalize()).dt.days
+        columns = {'days_out': days_out.astype('Int16')}
+        if self.lead_time_windows is not None:
+            columns['days_out_bucket'] = bucket_days_out(days_out, self.lead_time_windows)
+        return _add_columns(sales, columns)
 
-    def _regular_season(self) -> pd.DataFrame:
+    def _regular_season(self, sales: pd.DataFrame) -> pd.DataFrame:
         """This returns a dataframe with only regular season games. 
         The sales team is currently focused on regular season games, so most of the research excludes
-        cup and playoff games. 
+        cup and playoff games. The event codes are checked against the season calendar, so this 
+        can run before any other cleaning.
 
         Returns:
             pd.DataFrame_: sales dataframe containing only regular season games (excludes cup and playoff games)
         """
-        return self.total_sales[self.total_sales['game_type'] == "regular"]
+        regular = self.calendar.index[self.calendar['game_type'] == "regular"]
+        return _keep_rows(sales, sales['event_name'].isin(regular))
 
 
-    def _ticket_companies(self) -> pd.DataFrame:
+    def _ticket_companies(self, sales: pd.DataFrame) -> pd.DataFrame:
         """This drops entries that were bought through ticketing companies. 
         This is only applied when research is being done on zipcodes
 
         Returns:
             pd.DataFrame: sales dataframe that excludes tickets bought through ticketing companies 
         """
-        return self.total_sales[~self.total_sales['owner_name'].isin(['Optimal Ticketing', "Tix, Vet"])]
+        return _keep_rows(sales, ~sales['owner_name'].isin(TICKET_COMPANIES))
+
+
+    def _purchase_dates(self, sales: pd.DataFrame) -> pd.DataFrame:
+        """This keeps the purchases made from the first date of purchase_dates up to (not including) 
+        the second.
+
+        Returns:
+            pd.DataFrame: sales dataframe with only purchases in the date range
+        """
+        start, end = self.purchase_dates
+        keep = pd.Series(True, index = sales.index)
+        if start is not None:
+            keep &= sales['purchase_date'] >= pd.Timestamp(start)
+        if end is not None:
+            keep &= sales['purchase_date'] < pd.Timestamp(end)
+        return _keep_rows(sales, keep)
     
 
 
@@ -0,0 +1,134 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .raw_data_reader import LEAD_TIME_WINDOWS
+from .sales_cube import SalesCube
+
+# chart name -> (cube dimension on the x axis, axis label)
+CHARTS = {
+    'lead_time': ('days_out_bucket', 'Days out'),
+    'state': ('purchase_state', 'Purchase state'),
+    'ticket_group': ('updated_ticket_type', 'Ticket group'),
+    'opponent': ('opponent', 'Opponent'),
+}
+
+# charts drawn for every game, and for every season
+GAME_CHARTS = ['lead_time', 'state', 'ticket_group']
+SEASON_CHARTS = ['lead_time', 'state', 'ticket_group', 'opponent']
+
+# most bars drawn on a chart, the rest are left out (e.g. states with few buyers)
+MAX_BARS = 15
+
+# one chart to draw: file to save, title, axis labels and the values of the bars
+ChartJob = namedtuple('ChartJob', ['path', 'title', 'xlabel', 'ylabel', 'values'])
+
+
+def _bars(cube: SalesCube, dimension: str, measure: str, order: list = None) -> pd.Series:
+    """Sums a measure of the cube by one dimension, in the given order or largest first."""
+    values = cube.rollup(dimension)[measure]
+    values = values[values.index.notna()]
+    if order is not None:
+        return values.reindex([label for label in order if label in values.index])
+    return values.sort_values(ascending = False).head(MAX_BARS)
+
+
+def chart_jobs(cube: SalesCube, out_dir: str, measure: str = 'tickets', lead_time_windows: dict = None) -> list:
+    """This makes the chart set for every game and every season from the sales cube. Each job
+    holds only the bars of its chart, so the worker drawing it never sees the sales.
+
+    Arg:
+        cube (SalesCube): aggregated sales
+        out_dir (str): folder to save the charts in, one subfolder per season
+        measure (str, optional): purchases, tickets or revenue. Defaults to 'tickets'.
+        lead_time_windows (dict, optional): windows of the days_out buckets, in chart order.
+        Defaults to LEAD_TIME_WINDOWS.
+
+    Return:
+        list: ChartJob for every chart
+    """
+    windows = list(LEAD_TIME_WINDOWS if lead_time_windows is None else lead_time_windows)
+    seasons = {year: season for season, year in cube.seasons.items()}
+    jobs = []
+    for year in sorted(cube.rollup('year').index):
+        season_name = str(seasons.get(year, f'year {year}'))
+        season = cube.slice(year = year)
+        folder = os.path.join(out_dir, season_name)
+        for chart in SEASON_CHARTS:
+            dimension, xlabel = CHARTS[chart]
+            jobs.append(ChartJob(os.path.join(folder, f'season_{chart}.png'),
+                                 f'{season_name} season: {measure} by {xlabel.lower()}', xlabel, measure,
+                                 _bars(season, dimension, measure, windows if chart == 'lead_time' else None)))
+
+        for event_name, opponent in season.rollup('event_name', 'opponent').index:
+            game = season.slice(event_name = event_name)
+            title = event_name if pd.isna(opponent) else f'{event_name} vs {opponent}'
+            for chart in GAME_CHARTS:
+                dimension, xlabel = CHARTS[chart]
+                jobs.append(ChartJob(os.path.join(folder, f'{event_name}_{chart}.png'),
+                                     f'{title}: {measure} by {xlabel.lower()}', xlabel, measure,
+                                     _bars(game, dimension, measure, windows if chart == 'lead_time' else None)))
+    return jobs
+
+
+def render_chart(job: ChartJob) -> str:
+    """This draws one bar chart and saves it. The figure is drawn on the Agg canvas (no window
+    and no pyplot), so it works in worker processes and on machines without a display.
+    matplotlib and seaborn are only imported here, so loading sales never pays for them.
+
+    Arg:
+        job (ChartJob): the chart
+
+    Return:
+        str: path of the saved chart
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    try:
+        import seaborn as sns
+    except ImportError:
+        sns = None
+
+    figure = Figure(figsize = (8, 4.5))
+    FigureCanvasAgg(figure)
+    axes = figure.subplots()
+    labels = [str(label) for label in job.values.index]
+    if sns is not None:
+        sns.barplot(x = labels, y = job.values.to_numpy(), color = '#1f4e79', ax = axes)
+    else:
+        axes.bar(labels, job.values.to_numpy(), color = '#1f4e79')
+    axes.set_title(job.title)
+    axes.set_xlabel(job.xlabel)
+    axes.set_ylabel(job.ylabel)
+    axes.tick_params(axis = 'x', labelrotation = 45)
+    for label in axes.get_xticklabels():
+        label.set_horizontalalignment('right')
+    figure.tight_layout()
+    os.makedirs(os.path.dirname(job.path) or '.', exist_ok = True)
+    figure.savefig(job.path, dpi = 100)
+    return job.path
+
+
+def render_reports(sales, out_dir: str, measure: str = 'tickets', workers: int = None) -> list:
+    """This renders the report pack, the lead time, state and ticket group charts for every game
+    and those plus the opponent chart for every season, across a process pool. The sales are
+    summed into a SalesCube once, and each worker only gets the bars of the charts it draws.
+
+    Arg:
+        sales (Reader or SalesCube): loaded sales, or a cube already built from them
+        out_dir (str): folder to save the charts in, one subfolder per season
+        measure (str, optional): purchases, tickets or revenue. Defaults to 'tickets'.
+        workers (int, optional): number of processes. Defaults to one per core.
+
+    Return:
+        list: paths of the saved charts
+    """
+    cube = sales if isinstance(sales, SalesCube) else SalesCube.from_reader(sales)
+    jobs = chart_jobs(cube, out_dir, measure, cube.lead_time_windows)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [render_chart(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(render_chart, jobs, chunksize = max(1, len(jobs) // (workers * 4))))
@@ -0,0 +1,196 @@
+import pandas as pd
+
+from .raw_data_reader import LEAD_TIME_WINDOWS, bucket_days_out
+
+# columns the sales are summed over, e.g. sales by game, by ticket group or by state
+CUBE_DIMENSIONS = ['event_name', 'opponent', 'updated_ticket_type', 'purchase_state', 'In_or_Out',
+                   'days_out_bucket', 'year']
+
+# measure -> column of the sales data it is the sum of
+CUBE_MEASURES = {'tickets': 'num_seats', 'revenue': 'block_purchase_price'}
+
+
+def _aggregate(sales: pd.DataFrame, dimensions: list, lead_time_windows: dict) -> pd.DataFrame:
+    """This sums the sales over every combination of the dimensions that has sales. Purchases
+    is the number of rows, tickets the number of seats (purchases when the sales have no
+    num_seats column) and revenue the total purchase price (left out without block_purchase_price).
+
+    Return:
+        pd.DataFrame: one row per cell, with the dimensions and the measures as columns
+    """
+    if 'days_out_bucket' in dimensions and 'days_out_bucket' not in sales.columns:
+        sales = sales.assign(days_out_bucket = bucket_days_out(sales['days_out'], lead_time_windows))
+    measures = {'purchases': pd.Series(1, index = sales.index)}
+    for measure, column in CUBE_MEASURES.items():
+        if column in sales.columns:
+            measures[measure] = sales[column].fillna(0)
+    if 'tickets' not in measures:
+        measures['tickets'] = measures['purchases']
+    values = pd.DataFrame(measures).astype({'purchases': 'int64', 'tickets': 'int64'})
+    groups = values.groupby([sales[dimension] for dimension in dimensions], dropna = False,
+                            observed = True, sort = False)
+    return groups.sum().reset_index()
+
+
+def _sum_cells(cells: pd.DataFrame, dimensions: list) -> pd.DataFrame:
+    """Adds up cells that have the same dimensions, e.g. old cells and the cells of new sales."""
+    measures = [column for column in cells.columns if column not in dimensions]
+    cells = cells.fillna({measure: 0 for measure in measures})
+    return cells.groupby(dimensions, dropna = False, observed = True, sort = False)[measures].sum().reset_index()
+
+
+class SalesCube():
+    def __init__(self, sales: pd.DataFrame = None, dimensions: list = None, lead_time_windows: dict = None):
+        """Pre-aggregated sales. Tickets, revenue and purchases are summed once for every
+        combination of the dimensions, so roll-up and slice questions (e.g. tickets by opponent
+        for out of state buyers in year 1) are answered from the small table of cells instead
+        of another groupby over every purchase.
+
+        Arg:
+            sales (pd.DataFrame, optional): cleaned sales, e.g. Reader.total_sales. Defaults to None (empty cube).
+            dimensions (list, optional): columns to sum over. Defaults to CUBE_DIMENSIONS.
+            lead_time_windows (dict, optional): windows used for days_out_bucket when the sales
+            do not already have it. Defaults to LEAD_TIME_WINDOWS.
+        """
+        self.dimensions = list(CUBE_DIMENSIONS if dimensions is None else dimensions)
+        self.lead_time_windows = LEAD_TIME_WINDOWS if lead_time_windows is None else lead_time_windows
+        self.cells = None  # one row per combination of the dimensions, with the measures
+        self.rows = 0  # purchases summed into the cube
+        self.seasons = {}  # season -> year of the sales summed so far
+        if sales is not None:
+            self.update(sales)
+
+
+    @classmethod
+    def from_reader(cls, reader, dimensions: list = None) -> 'SalesCube':
+        """Builds the cube from a Reader's total_sales, creating any dimension it has not made yet
+        (e.g. in lazy mode).
+
+        Arg:
+            reader (Reader): reader with the cleaned sales loaded
+            dimensions (list, optional): columns to sum over. Defaults to CUBE_DIMENSIONS.
+
+        Return:
+            SalesCube: the cube
+        """
+        cube = cls(dimensions = dimensions, lead_time_windows = reader.lead_time_windows)
+        cube.update(reader.require(*cube._needed(reader.total_sales)))
+        return cube
+
+
+    def _needed(self, sales: pd.DataFrame) -> list:
+        """Returns the columns of the sales data the dimensions are made from."""
+        return [dimension if dimension != 'days_out_bucket' or dimension in sales.columns else 'days_out'
+                for dimension in self.dimensions]
+
+
+    def update(self, sales: pd.DataFrame) -> 'SalesCube':
+        """Adds new purchases to the cube. Only the new rows are aggregated, then their cells
+        are added to the existing ones.
+
+        Arg:
+            sales (pd.DataFrame): cleaned sales that are not in the cube yet
+
+        Return:
+            SalesCube: the cube, updated
+        """
+        if 'season' in sales.columns:
+            self.seasons.update(sales[['season', 'year']].drop_duplicates().itertuples(index = False))
+        cells = _aggregate(sales, self.dimensions, self.lead_time_windows)
+        if self.cells is not None:
+            cells = _sum_cells(pd.concat([self.cells, cells], ignore_index = True), self.dimensions)
+        self.cells = cells
+        self.rows += len(sales)
+        return self
+
+
+    def refresh(self, reader) -> 'SalesCube':
+        """Brings the cube up to date with a Reader in incremental mode (see Reader's dataset
+        option). When the last update only appended rows (reader.new_rows, the cleaned rows at
+        the end of total_sales), just those rows are added. The cube is rebuilt when it does not
+        line up with total_sales, e.g. when it was built from other sales, or an earlier season
+        was added and the years were numbered again.
+
+        Arg:
+            reader (Reader): reader with the cleaned sales loaded
+
+        Return:
+            SalesCube: the cube, updated
+        """
+        sales = reader.total_sales
+        new_rows = reader.new_rows or 0
+        if self.rows + new_rows != len(sales):
+            return self._rebuild(reader)
+        if new_rows == 0:
+            return self
+        new_sales = reader.require(*self._needed(sales)).iloc[len(sales) - new_rows:]
+        seasons = dict(new_sales[['season', 'year']].drop_duplicates().itertuples(index = False))
+        if self.seasons and any(season < max(self.seasons) or self.seasons.get(season, year) != year
+                                for season, year in seasons.items()):
+            return self._rebuild(reader)
+        return self.update(new_sales)
+
+
+    def _rebuild(self, reader) -> 'SalesCube':
+        """Sums the whole of the reader's total_sales again."""
+        self.cells, self.rows, self.seasons = None, 0, {}
+        return self.update(reader.require(*self._needed(reader.total_sales)))
+
+
+    def rollup(self, *dimensions) -> pd.DataFrame:
+        """Sums the cube up to fewer dimensions, e.g. rollup('opponent') for tickets and revenue by
+        opponent, or rollup() for the grand total.
+
+        Arg:
+            *dimensions (str): dimensions to keep
+
+        Raise:
+            KeyError: if a dimension is not in the cube
+
+        Return:
+            pd.DataFrame: measures indexed by the dimensions
+        """
+        missing = [dimension for dimension in dimensions if dimension not in self.dimensions]
+        if missing:
+            raise KeyError(f"{', '.join(missing)} is not a dimension of the cube")
+        measures = self.measures
+        cells = pd.DataFrame(columns = self.dimensions + measures) if self.cells is None else self.cells
+        if not dimensions:
+            return pd.DataFrame({measure: [cells[measure].sum()] for measure in measures}, index = ['total'])
+        return cells.groupby(list(dimensions), dropna = False, observed = True)[measures].sum()
+
+
+    def slice(self, **filters) -> 'SalesCube':
+        """Keeps only the cells matching every filter, e.g. slice(year = 1, In_or_Out = 'Out of State') or
+        slice(updated_ticket_type = ['flex', 'group']).
+
+        Arg:
+            **filters: dimension -> value, or a list of values, to keep
+
+        Raise:
+            KeyError: if a filter is not a dimension of the cube
+
+        Return:
+            SalesCube: a new cube with only the matching cells
+        """
+        missing = [dimension for dimension in filters if dimension not in self.dimensions]
+        if missing:
+            raise KeyError(f"{', '.join(missing)} is not a dimension of the cube")
+        cube = SalesCube(dimensions = self.dimensions, lead_time_windows = self.lead_time_windows)
+        if self.cells is None:
+            return cube
+        keep = pd.Series(True, index = self.cells.index)
+        for dimension, values in filters.items():
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            keep &= self.cells[dimension].isin(values)
+        cube.cells = self.cells[keep].reset_index(drop = True)
+        cube.rows = int(cube.cells['purchases'].sum())
+        return cube
+
+
+    @property
+    def measures(self) -> list:
+        """Measures in the cube: purchases, tickets and revenue (when the sales had prices)."""
+        if self.cells is None:
+            return ['purchases', 'tickets']
+        return [measure for measure in ['purchases', 'tickets', 'revenue'] if measure in self.cells.columns]
@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+
+# columns looked up by value -> a hash index (value -> rows)
+HASH_INDEX_COLUMNS = ['event_name', 'owner_name', 'updated_ticket_type']
+
+# columns looked up by range -> a sorted index (values in order, with their rows)
+SORTED_INDEX_COLUMNS = ['purchase_date', 'days_out']
+
+
+def _hash_index(values: pd.Series, offset: int = 0) -> dict:
+    """This groups the row numbers by value, leaving out missing values.
+
+    Arg:
+        values (pd.Series): column to index
+        offset (int, optional): row number of the first value. Defaults to 0.
+
+    Return:
+        dict: value -> sorted row numbers (np.ndarray)
+    """
+    rows = values.groupby(values, dropna = True, observed = True, sort = False).indices
+    return {value: positions + offset for value, positions in rows.items()}
+
+
+def _sorted_index(values: pd.Series, offset: int = 0) -> tuple:
+    """This sorts a column's values, leaving out missing values, and keeps the row each came from.
+
+    Arg:
+        values (pd.Series): column to index
+        offset (int, optional): row number of the first value. Defaults to 0.
+
+    Return:
+        tuple: sorted values (np.ndarray), and their row numbers (np.ndarray)
+    """
+    valid = values.notna().to_numpy()
+    rows = np.flatnonzero(valid)
+    keys = values[valid].to_numpy(dtype = 'datetime64[ns]' if values.dtype.kind == 'M' else 'float64')
+    order = np.argsort(keys, kind = 'stable')
+    return keys[order], rows[order] + offset
+
+
+def _identity(values: pd.Series) -> int:
+    """Returns what identifies the data behind a column: the address of a numpy column's memory,
+    or the extension array holding the column. It changes when the column is replaced or the
+    frame is sorted in place, so those edits can be noticed without comparing values."""
+    if isinstance(values.dtype, np.dtype):
+        return values.to_numpy().__array_interface__['data'][0]
+    return id(values.array)
+
+
+def _key(keys: np.ndarray, value):
+    """Turns a value to look up (e.g. a date string) into the type of a sorted index's keys."""
+    if keys.dtype.kind == 'M':
+        return pd.Timestamp(value).to_datetime64().astype(keys.dtype)
+    return value
+
+
+class SalesIndex():
+    def __init__(self, sales: pd.DataFrame, require = None):
+        """Indexes on the key columns of the cleaned sales, so point and range lookups (e.g. every
+        purchase for 24RH0720 between 30 and 7 days out) only touch the matching rows instead of
+        building a mask over every purchase. event_name, owner_name and updated_ticket_type get
+        hash indexes, purchase_date and days_out sorted ones. Each index is built the first time
+        its column is looked up. Sorting the sales or replacing an indexed column in place is
+        noticed by sync, but values changed cell by cell (e.g. sales.loc[5, 'event_name'] = ...)
+        are not: call reset after those.
+
+        Arg:
+            sales (pd.DataFrame): cleaned sales, e.g. Reader.total_sales
+            require (function, optional): called with a column name to create a missing column,
+            returning the sales with it (e.g. Reader.require). Defaults to None.
+        """
+        self.sales = sales
+        self.require = require
+        self.rows = len(sales)  # rows covered by the indexes
+        self.indexes = {}  # column -> hash index (dict) or sorted index (tuple)
+        self.labels = sales.index  # row labels of the indexed sales
+        self.identities = {}  # column -> identity of the data it was indexed from (see _identity)
+
+
+    def _remember(self):
+        """Records the row labels and the column data the indexes were built from, see _changed."""
+        self.labels = self.sales.index
+        self.identities = {column: _identity(self.sales[column]) for column in self.indexes}
+
+
+    def _changed(self, sales: pd.DataFrame) -> bool:
+        """Checks if the indexed sales were changed in place (sorted, or an indexed column replaced)
+        since the indexes were last updated."""
+        return sales.index is not self.labels or any(
+            column not in sales.columns or _identity(sales[column]) != identity
+            for column, identity in self.identities.items())
+
+
+    def reset(self):
+        """Drops every index, to be built again when used. Needed after values of the sales are
+        changed cell by cell, which sync can not notice."""
+        self.indexes, self.rows = {}, len(self.sales)
+        self._remember()
+
+
+    def _column(self, column: str) -> pd.Series:
+        """Returns a column of the sales, creating it first if it is missing and can be made."""
+        if column not in self.sales.columns and self.require is not None:
+            self.sales = self.require(column)
+            self._remember()
+        return self.sales[column]
+
+
+    def _index(self, column: str):
+        """Returns the index of a column, building it if needed."""
+        if column not in self.indexes:
+            values = self._column(column).iloc[:self.rows]
+            if column in SORTED_INDEX_COLUMNS:
+                self.indexes[column] = _sorted_index(values)
+            else:
+                self.indexes[column] = _hash_index(values)
+            self.identities[column] = _identity(self.sales[column])
+        return self.indexes[column]
+
+
+    def append(self, sales: pd.DataFrame):
+        """Adds rows appended to the end of the sales to every index that was built. Only the new
+        rows are indexed, then merged into the existing indexes.
+
+        Arg:
+            sales (pd.DataFrame): the sales, with the new rows at the end
+        """
+        new = sales.iloc[self.rows:]
+        for column, index in self.indexes.items():
+            if column in SORTED_INDEX_COLUMNS:
+                keys, rows = index
+                new_keys, new_rows = _sorted_index(new[column], self.rows)
+                # equal values keep the older rows first, like a stable sort of everything
+                at = np.searchsorted(keys, new_keys, side = 'right')
+                self.indexes[column] = np.insert(keys, at, new_keys), np.insert(rows, at, new_rows)
+            else:
+                for value, new_rows in _hash_index(new[column], self.rows).items():
+                    index[value] = np.concatenate([index[value], new_rows]) if value in index else new_rows
+        self.sales = sales
+        self.rows = len(sales)
+        self._remember()
+
+
+    def _extends(self, sales: pd.DataFrame) -> bool:
+        """Checks if the sales start with the rows the indexes were built on, unchanged: the same
+        index labels and the same values in every indexed column."""
+        if len(sales) < self.rows or not sales.index[:self.rows].equals(self.sales.index[:self.rows]):
+            return False
+        return all(column in sales.columns and sales[column].iloc[:self.rows].equals(self.sales[column].iloc[:self.rows])
+                   for column in self.indexes)
+
+
+    def sync(self, sales: pd.DataFrame) -> 'SalesIndex':
+        """Points the indexes at the current sales. Rows appended since the last call are added
+        to the indexes. If the sales are a different frame that does not start with the indexed
+        rows (e.g. sorted, shuffled or read again), or the same frame sorted or with an indexed
+        column replaced in place, the indexes are dropped and built again when used.
+
+        Arg:
+            sales (pd.DataFrame): the sales
+
+        Return:
+            SalesIndex: the index
+        """
+        if (len(sales) < self.rows or (sales is self.sales and self._changed(sales))
+                or (sales is not self.sales and not self._extends(sales))):
+            self.indexes, self.rows = {}, len(sales)
+        elif len(sales) > self.rows:
+            self.append(sales)
+        self.sales = sales
+        self._remember()
+        return self
+
+
+    def _match(self, column: str, condition) -> np.ndarray:
+        """Returns the sorted row numbers matching one condition (see positions)."""
+        index = self._index(column)
+        if column in SORTED_INDEX_COLUMNS:
+            keys, rows = index
+            low, high = condition if isinstance(condition, tuple) else (condition, condition)
+            start = 0 if low is None else np.searchsorted(keys, _key(keys, low), 'left')
+            stop = len(keys) if high is None else np.searchsorted(keys, _key(keys, high), 'right')
+            return np.sort(rows[start:stop])
+        values = condition if isinstance(condition, (list, set)) else [condition]
+        found = [index[value] for value in values if value in index]
+        if len(found) == 1:
+            return found[0]
+        return np.unique(np.concatenate(found)) if found else np.array([], dtype = 'int64')
+
+
+    def positions(self, **conditions) -> np.ndarray:
+        """Finds the rows matching every condition. A condition is a value, a list of values
+        (any of them), or for purchase_date and days_out a (low, high) tuple of the range to keep,
+        including both ends, where either can be None. Conditions on columns without an index are
+        checked on the matching rows only.
+
+        Arg:
+            **conditions: column -> value, list of values or (low, high) range
+
+        Return:
+            np.ndarray: row numbers of the matching rows, in order
+        """
+        indexed = [column for column in conditions if column in HASH_INDEX_COLUMNS + SORTED_INDEX_COLUMNS]
+        rows = None
+        # the smallest match first, so the other matches are intersected with as few rows as possible
+        for match in sorted((self._match(column, conditions[column]) for column in indexed), key = len):
+            rows = match if rows is None else np.intersect1d(rows, match, assume_unique = True)
+        if rows is None:
+            rows = np.arange(self.rows)
+        for column in conditions:
+            if column in indexed:
+                continue
+            condition = conditions[column]
+            values = self._column(column).iloc[rows]
+            if isinstance(condition, tuple):
+                low, high = condition
+                keep = values.notna()
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+            else:
+                keep = values.isin(condition if isinstance(condition, (list, set)) else [condition])
+            rows = rows[keep.to_numpy(dtype = bool)]
+        return rows
+
+
+    def lookup(self, **conditions) -> pd.DataFrame:
+        """Returns the sales matching every condition (see positions), e.g.
+        lookup(event_name = '24RH0720', days_out = (7, 30)).
+
+        Return:
+            pd.DataFrame: matching sales, in their original order
+        """
+        # positions can add columns to the sales in lazy mode, so it runs first
+        rows = self.positions(**conditions)
+        return self.sales.iloc[rows]
@@ -0,0 +1,205 @@
+import glob
+import json
+import os
+import re
+import shutil
+
+import pandas as pd
+
+from .storage import FRAME_FORMAT, read_frame, write_frame
+
+# columns the store is split on, one folder level each
+PARTITION_COLUMNS = ['season', 'event_name']
+
+# columns with min/max statistics in the manifest, so reads can skip partitions by range
+STATS_COLUMNS = ['purchase_date', 'days_out']
+
+MANIFEST = 'manifest.json'
+STORE_VERSION = 1
+
+
+def _partition_dir(season, event_name) -> str:
+    """Returns the folder of a partition, relative to the store, e.g. season=2024/event_name=24RH0720."""
+    name = '__missing__' if pd.isna(event_name) else re.sub(r'[^A-Za-z0-9_-]', '_', str(event_name))
+    return os.path.join(f'season={season}', f'event_name={name}')
+
+
+def _stats(sales: pd.DataFrame) -> dict:
+    """Returns the min and max of each STATS_COLUMNS column of a partition (None when all missing)."""
+    stats = {}
+    for column in STATS_COLUMNS:
+        if column not in sales.columns:
+            continue
+        low, high = sales[column].min(), sales[column].max()
+        if pd.isna(low):
+            stats[column] = [None, None]
+        elif isinstance(low, pd.Timestamp):
+            stats[column] = [low.isoformat(), high.isoformat()]
+        else:
+            stats[column] = [int(low), int(high)]
+    return stats
+
+
+def load_manifest(root: str) -> dict:
+    """This loads the manifest of a sales store, which lists every partition with its season,
+    year, event_name, rows and the min/max of purchase_date and days_out.
+
+    Arg:
+        root (str): folder of the store
+
+    Return:
+        dict: the manifest (no partitions if the store does not exist yet)
+    """
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return {'version': STORE_VERSION, 'format': FRAME_FORMAT, 'columns': [], 'partitions': []}
+    with open(path) as file:
+        return json.load(file)
+
+
+def _write_manifest(root: str, manifest: dict):
+    """Saves the manifest, writing then renaming so readers never see half a manifest."""
+    path = os.path.join(root, MANIFEST)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(manifest, file, indent = 1)
+    os.replace(path + '.tmp', path)
+
+
+def write_store(sales: pd.DataFrame, root: str, append: bool = False) -> dict:
+    """This saves cleaned sales (e.g. Reader.total_sales) as a store partitioned by season and
+    event_name, one file per game, with a manifest of the partitions and their statistics.
+    When appending, only the partitions that get new rows are rewritten.
+
+    Arg:
+        sales (pd.DataFrame): cleaned sales with season and event_name columns
+        root (str): folder of the store
+        append (bool, optional): add the sales to an existing store instead of replacing it.
+        Defaults to False.
+
+    Return:
+        dict: the manifest
+    """
+    manifest = load_manifest(root)
+    if not append or manifest.get('format') != FRAME_FORMAT:
+        # only the store's own files are removed, in case root holds anything else
+        for folder in glob.glob(os.path.join(root, 'season=*')):
+            shutil.rmtree(folder)
+        manifest = {'version': STORE_VERSION, 'format': FRAME_FORMAT, 'columns': [], 'partitions': []}
+    os.makedirs(root, exist_ok = True)
+
+    partitions = {partition['path']: partition for partition in manifest['partitions']}
+    groups = sales.groupby(PARTITION_COLUMNS, dropna = False, observed = True, sort = True)
+    for (season, event_name), rows in groups:
+        path = os.path.join(_partition_dir(season, event_name), 'sales')
+        if path in partitions:
+            rows = pd.concat([read_frame(os.path.join(root, path)), rows], ignore_index = True)
+        os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok = True)
+        write_frame(rows.reset_index(drop = True), os.path.join(root, path))
+        partitions[path] = {'path': path, 'season': int(season),
+                            'event_name': None if pd.isna(event_name) else event_name,
+                            'rows': len(rows), 'stats': _stats(rows)}
+
+    # seasons are numbered from 0 in order, like Reader's year column, over everything in the store
+    years = {season: year for year, season in enumerate(sorted({partition['season'] for partition in partitions.values()}))}
+    for partition in partitions.values():
+        partition['year'] = years[partition['season']]
+    manifest['partitions'] = sorted(partitions.values(), key = lambda partition: partition['path'])
+    manifest['columns'] = list(dict.fromkeys(manifest['columns'] + list(sales.columns)))
+    _write_manifest(root, manifest)
+    return manifest
+
+
+def _overlaps(stats: list, low, high, convert, include_high: bool = True) -> bool:
+    """Checks if a partition's [min, max] can hold values in the range [low, high], or [low, high)
+    when include_high is False."""
+    if stats is None:
+        return True
+    smallest, largest = stats
+    if smallest is None:
+        return False
+    if low is not None and convert(largest) < convert(low):
+        return False
+    if high is None:
+        return True
+    return convert(smallest) <= convert(high) if include_high else convert(smallest) < convert(high)
+
+
+def _matches(value, wanted) -> bool:
+    """Checks a partition key against a value, or a list of values, to keep (None keeps all)."""
+    if wanted is None:
+        return True
+    return value in (wanted if isinstance(wanted, (list, tuple, set)) else [wanted])
+
+
+def store_partitions(root: str, season = None, year = None, event_name = None, purchase_dates: tuple = None,
+                     days_out: tuple = None) -> list:
+    """This finds the partitions of a store that can hold the sales asked for, from the manifest
+    alone. Partitions whose purchase_date or days_out range falls outside the ranges asked for
+    are skipped.
+
+    Arg:
+        root (str): folder of the store
+        season, year, event_name (optional): value or list of values to keep. Defaults to None (all).
+        purchase_dates (tuple, optional): keep purchases from the first date up to (not including) 
+        the second, like Reader's purchase_dates, either can be None. Defaults to None.
+        days_out (tuple, optional): (fewest, most) days out to keep, either can be None. Defaults to None.
+
+    Return:
+        list: manifest entries of the partitions to read
+    """
+    partitions = []
+    for partition in load_manifest(root)['partitions']:
+        stats = partition['stats']
+        if not (_matches(partition['season'], season) and _matches(partition['year'], year)
+                and _matches(partition['event_name'], event_name)):
+            continue
+        if purchase_dates is not None and not _overlaps(stats.get('purchase_date'), *purchase_dates, pd.Timestamp,
+                                                        include_high = False):
+            continue
+        if days_out is not None and not _overlaps(stats.get('days_out'), *days_out, int):
+            continue
+        partitions.append(partition)
+    return partitions
+
+
+def read_store(root: str, columns: list = None, season = None, year = None, event_name = None,
+               purchase_dates: tuple = None, days_out: tuple = None) -> pd.DataFrame:
+    """This loads sales from a store, opening only the partitions that can hold the sales asked
+    for (see store_partitions) and only the columns asked for. The rows of those partitions are
+    then filtered on the purchase_dates range, which leaves out its last date like Reader's 
+    purchase_dates, and the days_out range, which includes both ends. For example,
+    read_store(root, ['owner_name', 'num_seats'], event_name = '24RH0720', days_out = (7, 30)).
+
+    Arg:
+        root (str): folder of the store
+        columns (list, optional): columns to load. Defaults to None (all columns).
+        season, year, event_name (optional): value or list of values to keep. Defaults to None (all).
+        purchase_dates (tuple, optional): keep purchases from the first date up to (not including) 
+        the second, like Reader's purchase_dates, either can be None. Defaults to None.
+        days_out (tuple, optional): (fewest, most) days out to keep, either can be None. Defaults to None.
+
+    Return:
+        pd.DataFrame: the matching sales
+    """
+    ranges = {column: bounds for column, bounds in [('purchase_date', purchase_dates), ('days_out', days_out)]
+              if bounds is not None}
+    load = None if columns is None else list(dict.fromkeys(list(columns) + list(ranges)))
+    frames = []
+    for partition in store_partitions(root, season, year, event_name, purchase_dates, days_out):
+        sales = read_frame(os.path.join(root, partition['path']), load)
+        if 'year' in sales.columns:
+            # appending an earlier season numbers the seasons again
+            sales = sales.assign(year = partition['year'])
+        for column, (low, high) in ranges.items():
+            if column == 'purchase_date':
+                low, high = [None if bound is None else pd.Timestamp(bound) for bound in (low, high)]
+            keep = sales[column].notna()
+            if low is not None:
+                keep &= sales[column] >= low
+            if high is not None:
+                keep &= sales[column] < high if column == 'purchase_date' else sales[column] <= high
+            sales = sales[keep]
+        frames.append(sales if columns is None else sales[list(columns)])
+    if not frames:
+        return pd.DataFrame(columns = columns if columns is not None else load_manifest(root)['columns'])
+    return pd.concat(frames, ignore_index = True)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 (only needed for parquet files)
+    FRAME_FORMAT = 'parquet'
+except ImportError:
+    FRAME_FORMAT = 'pickle'
+
+FRAME_EXTENSIONS = {'parquet': '.parquet', 'pickle': '.pkl'}
+
+
+def write_frame(frame: pd.DataFrame, path: str) -> str:
+    """This saves a dataframe in a fast binary format. Parquet (columnar) is used when pyarrow
+    is installed, otherwise pickle. The extension is added to the path.
+
+    Arg:
+        frame (pd.DataFrame): data to save
+        path (str): file path without an extension
+
+    Return:
+        str: path of the saved file
+    """
+    path = path + FRAME_EXTENSIONS[FRAME_FORMAT]
+    temporary = path + '.tmp'
+    if FRAME_FORMAT == 'parquet':
+        frame.to_parquet(temporary, index = False)
+    else:
+        frame.reset_index(drop = True).to_pickle(temporary)
+    # write then rename, so a crash never leaves a half written file behind
+    os.replace(temporary, path)
+    return path
+
+
+def read_frame(path: str, columns: list = None) -> pd.DataFrame:
+    """This loads a dataframe saved by write_frame.
+
+    Arg:
+        path (str): file path, with or without its extension
+        columns (list, optional): only load these columns. Defaults to None (all columns).
+
+    Return:
+        pd.DataFrame: the saved data
+    """
+    if os.path.splitext(path)[1] not in FRAME_EXTENSIONS.values():
+        path = path + FRAME_EXTENSIONS[FRAME_FORMAT]
+    if path.endswith(FRAME_EXTENSIONS['parquet']):
+        return pd.read_parquet(path, columns = columns)
+    frame = pd.read_pickle(path)
+    return frame if columns is None else frame[columns]
+
+
+def frame_path(path: str) -> str:
+    """Returns the file write_frame would create for a path without an extension."""
+    return path + FRAME_EXTENSIONS[FRAME_FORMAT]
+
+
+def file_fingerprint(path: str) -> dict:
+    """This describes a file by its full path, size and modification time, which is enough to
+    tell if a sales export changed without reading the whole file.
+
+    Arg:
+        path (str): file path
+
+    Return:
+        dict: path, size and mtime of the file
+    """
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def file_marks(path: str, offset: int = None, block_size: int = 1 << 16) -> dict:
+    """This describes the start of a file up to an offset by hashes of its first block and of the
+    block before the offset. A cumulative export that only had rows added at the end keeps the
+    marks of the earlier export, so the rows after the offset are the new ones.
+
+    Arg:
+        path (str): file path
+        offset (int, optional): end of the part of the file to describe. Defaults to None (the whole file).
+        block_size (int, optional): bytes hashed at each end. Defaults to 64 KB.
+
+    Return:
+        dict: offset, head and tail hashes, or None if the file is shorter than the offset
+    """
+    size = os.path.getsize(path)
+    offset = size if offset is None else offset
+    if offset > size:
+        return None
+    with open(path, 'rb') as file:
+        head = file.read(min(block_size, offset))
+        file.seek(max(0, offset - block_size))
+        tail = file.read(offset - max(0, offset - block_size))
+    return {'offset': offset, 'head': hashlib.sha256(head).hexdigest(), 'tail': hashlib.sha256(tail).hexdigest()}
+
+
+def source_hash(path: str) -> str:
+    """Returns a hash of a file's contents, used to notice changes to code or lookup tables."""
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def cache_key(*parts) -> str:
+    """This combines anything json serializable (fingerprints, options, versions) into one hash.
+
+    Return:
+        str: hex digest of the parts
+    """
+    text = json.dumps(parts, sort_keys = True, default = str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
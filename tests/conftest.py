@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the package, and the synthetic sales generator in benchmarks/
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+@pytest.fixture(scope = 'session')
+def sales_files(tmp_path_factory) -> list:
+    """Small synthetic 2023 (utf-8) and 2024 (latin1) season exports."""
+    from synthetic_sales import write_sales
+    return write_sales(str(tmp_path_factory.mktemp('sales')), 20_000)
+
+
+def write_export(path: str, source: str, fraction: float = 1.0, order = None) -> str:
+    """Writes the first fraction of a sales file's rows (in the given order) as a cumulative export."""
+    with open(source, 'rb') as file:
+        header, *rows = [line for line in file.read().split(b'\n') if line]
+    if order is not None:
+        rows = [rows[position] for position in order]
+    with open(path, 'wb') as file:
+        file.write(b'\n'.join([header] + rows[:int(len(rows) * fraction)]) + b'\n')
+    return path
@@ -0,0 +1,29 @@
+import pandas as pd
+
+import soccer_tickets.raw_data_reader as raw_data_reader
+from soccer_tickets.raw_data_reader import Reader
+
+
+def test_sharded_results_keep_the_row_order(sales_files, monkeypatch):
+    monkeypatch.setattr(raw_data_reader, 'SHARD_MIN_ROWS', 0)
+    reader = Reader(*sales_files, workers = 1)
+    # games spread over the rows, so every shard takes rows from all over the frame
+    reader.total_sales = reader.total_sales.sample(frac = 1, random_state = 0)
+    sharded = reader.apply_sharded(reader.simpler_ticket_type, 'updated_ticket_type', workers = 2)
+    expected = reader.total_sales['updated_ticket_type'].apply(reader.simpler_ticket_type)
+    pd.testing.assert_series_equal(sharded, expected, check_names = False)
+
+    opponents = reader.apply_sharded(reader._opponent, 'event_name', workers = 2)
+    pd.testing.assert_series_equal(opponents, reader.total_sales['event_name'].apply(reader._opponent),
+                                   check_names = False)
+
+
+def test_lambda_runs_in_this_process(sales_files, monkeypatch, capsys):
+    monkeypatch.setattr(raw_data_reader, 'SHARD_MIN_ROWS', 0)
+    monkeypatch.setattr(raw_data_reader, 'ProcessPoolExecutor', None)  # a pool would fail
+    reader = Reader(*sales_files, workers = 1)
+    capsys.readouterr()
+    seats = reader.apply_sharded(lambda first, last: last - first + 1, 'first_seat', 'last_seat', workers = 2)
+    assert 'running it in this process' in capsys.readouterr().out
+    expected = reader.total_sales['last_seat'] - reader.total_sales['first_seat'] + 1
+    pd.testing.assert_series_equal(seats, expected, check_names = False, check_dtype = False)
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from conftest import ROOT
+from soccer_tickets.raw_data_reader import Reader
+
+
+def test_cache_hit_matches_a_fresh_load(sales_files, tmp_path):
+    loaded = Reader(*sales_files, workers = 1).total_sales
+    Reader(*sales_files, workers = 1, cache_dir = str(tmp_path))
+    cached = Reader(*sales_files, workers = 1, cache_dir = str(tmp_path)).total_sales
+    pd.testing.assert_frame_equal(cached, loaded)
+
+
+def test_module_runs_as_a_script(tmp_path):
+    script = os.path.join(ROOT, 'soccer_tickets', 'raw_data_reader.py')
+    result = subprocess.run([sys.executable, script], cwd = tmp_path, capture_output = True, text = True)
+    assert result.returncode == 0, result.stderr
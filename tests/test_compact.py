@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from soccer_tickets.raw_data_reader import Reader, compact_frame
+
+
+def test_prices_keep_their_cents():
+    prices = pd.Series(np.random.default_rng(0).integers(100, 1_000_000, 100_000) / 100)
+    compacted = compact_frame(pd.DataFrame({'block_purchase_price': prices, 'num_seats': 2}))
+    assert compacted['block_purchase_price'].dtype == 'float64'
+    assert compacted['num_seats'].dtype == 'int8'
+    assert compacted['block_purchase_price'].sum() == prices.sum()
+
+
+def test_compact_reader_keeps_revenue(sales_files):
+    sales = Reader(*sales_files, workers = 1).total_sales
+    compacted = Reader(*sales_files, workers = 1, compact = True).total_sales
+    revenue = sales.groupby('event_name')['block_purchase_price'].sum()
+    compacted_revenue = compacted.groupby('event_name', observed = True)['block_purchase_price'].sum()
+    pd.testing.assert_series_equal(compacted_revenue.sort_index(), revenue.sort_index(), check_index_type = False,
+                                   check_categorical = False)
@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from conftest import write_export
+from soccer_tickets.raw_data_reader import Reader
+
+pytest.importorskip('pyarrow')
+
+SORT_COLUMNS = ['season', 'event_name', 'add_datetime', 'owner_name', 'section_name', 'row_name', 'first_seat']
+
+
+def _sorted(sales: pd.DataFrame) -> pd.DataFrame:
+    return sales.drop(columns = ['purchase_key'], errors = 'ignore').sort_values(SORT_COLUMNS).reset_index(drop = True)
+
+
+def test_engines_clean_the_same_sales(sales_files):
+    c = Reader(*sales_files, workers = 1, csv_engine = 'c').total_sales
+    arrow = Reader(*sales_files, workers = 1, csv_engine = 'pyarrow').total_sales
+    pd.testing.assert_frame_equal(arrow, c)
+    # the 2024 export is latin1
+    assert not c['owner_name'].dropna().map(str.isascii).all()
+
+
+def test_pyarrow_dataset_update_reads_the_new_rows(sales_files, tmp_path):
+    sales23, sales24 = sales_files
+    dataset = str(tmp_path / 'sales')
+    export = write_export(str(tmp_path / '2024_Sales.csv'), sales24, 0.9)
+    Reader(sales23, export, dataset = dataset, workers = 1, csv_engine = 'pyarrow')
+    write_export(export, sales24)
+    updated = Reader(sales23, export, dataset = dataset, workers = 1, csv_engine = 'pyarrow')
+    assert updated.new_rows > 0
+    loaded = Reader(sales23, sales24, workers = 1, csv_engine = 'c').total_sales
+    pd.testing.assert_frame_equal(_sorted(updated.total_sales), _sorted(loaded), check_dtype = False)
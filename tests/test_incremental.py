@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from conftest import write_export
+from soccer_tickets.raw_data_reader import Reader
+
+SORT_COLUMNS = ['season', 'event_name', 'add_datetime', 'owner_name', 'section_name', 'row_name', 'first_seat']
+
+
+def _sorted(sales: pd.DataFrame) -> pd.DataFrame:
+    return sales.drop(columns = ['purchase_key'], errors = 'ignore').sort_values(SORT_COLUMNS).reset_index(drop = True)
+
+
+def _record_reads(monkeypatch) -> list:
+    """Records the start offset of every sales file read by Reader."""
+    starts = []
+    read_season = Reader._read_season
+
+    def recording_read_season(self, season_file, chunksize = None, start = 0):
+        starts.append(start)
+        return read_season(self, season_file, chunksize, start)
+
+    monkeypatch.setattr(Reader, '_read_season', recording_read_season)
+    return starts
+
+
+def test_updates_read_only_new_rows(sales_files, tmp_path, monkeypatch):
+    sales23, sales24 = sales_files
+    dataset = str(tmp_path / 'dataset' / 'sales')
+    export = write_export(str(tmp_path / '2024_Sales_as_of_Oct03.csv'), sales24, 0.9)
+    first = Reader(sales23, export, dataset = dataset, workers = 1)
+    assert first.new_rows == len(first.total_sales)
+
+    starts = _record_reads(monkeypatch)
+    unchanged = Reader(sales23, export, dataset = dataset, workers = 1)
+    assert starts == []
+    assert unchanged.new_rows == 0
+    assert len(unchanged.total_sales) == len(first.total_sales)
+
+    # rows added to the export, then a later export under a new name: only the added rows are parsed
+    write_export(export, sales24, 0.95)
+    appended = Reader(sales23, export, dataset = dataset, workers = 1)
+    later = Reader(sales23, write_export(str(tmp_path / '2024_Sales_as_of_Oct10.csv'), sales24),
+                   dataset = dataset, workers = 1)
+    assert len(starts) == 2 and all(start > 0 for start in starts)
+    assert appended.new_rows == len(appended.total_sales) - len(first.total_sales) > 0
+    assert later.new_rows == len(later.total_sales) - len(appended.total_sales) > 0
+
+    loaded = Reader(sales23, sales24, workers = 1)
+    pd.testing.assert_frame_equal(_sorted(later.total_sales), _sorted(loaded.total_sales), check_dtype = False)
+
+
+def test_rewritten_export_adds_no_rows(sales_files, tmp_path):
+    sales23, sales24 = sales_files
+    dataset = str(tmp_path / 'sales')
+    Reader(sales23, sales24, dataset = dataset, workers = 1)
+    with open(sales24, 'rb') as file:
+        rows = sum(1 for line in file if line.strip()) - 1
+    shuffled = write_export(str(tmp_path / '2024_Sales_shuffled.csv'), sales24,
+                            order = np.random.default_rng(0).permutation(rows))
+    reloaded = Reader(sales23, shuffled, dataset = dataset, workers = 1)
+    assert reloaded.new_rows == 0
+    assert not reloaded.total_sales['purchase_key'].duplicated().any()
@@ -0,0 +1,15 @@
+import pytest
+
+from bench_memory import measure_ingest
+
+# peak memory of the main process while loading, as a multiple of the loaded total_sales
+MAX_PEAK_RATIO = 2.0
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_peak_ingest_memory_is_bounded(sales_files, workers):
+    result = measure_ingest(sales_files, workers)
+    assert result['rows'] > 0
+    assert result['ratio'] < MAX_PEAK_RATIO, (
+        f"peak {result['peak_bytes'] / 1e6:.1f} MB is {result['ratio']:.2f}x "
+        f"the final {result['final_bytes'] / 1e6:.1f} MB with {workers} workers")
@@ -0,0 +1,11 @@
+import pandas as pd
+
+from soccer_tickets.raw_data_reader import Reader
+
+
+def test_lazy_columns_match_the_loaded_sales(sales_files):
+    loaded = Reader(*sales_files, workers = 1).total_sales
+    reader = Reader(*sales_files, workers = 1, lazy = True)
+    assert len(reader.total_sales.columns) < len(loaded.columns)
+    columns = list(loaded.columns)
+    pd.testing.assert_frame_equal(reader.require(*columns)[columns], loaded)
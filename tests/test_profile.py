@@ -0,0 +1,24 @@
+import tracemalloc
+
+from soccer_tickets.raw_data_reader import Reader
+
+
+def test_profile_times_stages_without_tracing(sales_files):
+    reader = Reader(*sales_files, workers = 1, profile = True)
+    assert not tracemalloc.is_tracing()
+    assert reader.stage_report and all(record['seconds'] >= 0 and record['peak_memory'] is None
+                                       for record in reader.stage_report)
+
+
+def test_trace_memory_keeps_the_callers_session(sales_files):
+    tracemalloc.start()
+    try:
+        held = bytearray(50_000_000)
+        del held
+        reader = Reader(*sales_files, workers = 1, profile = True, trace_memory = True)
+        assert tracemalloc.is_tracing()
+        assert tracemalloc.get_traced_memory()[1] >= 50_000_000
+    finally:
+        tracemalloc.stop()
+    assert all(record['seconds'] is None and record['peak_memory'] >= 0 for record in reader.stage_report)
+    assert max(record['peak_memory'] for record in reader.stage_report) > 0
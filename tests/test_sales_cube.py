@@ -0,0 +1,35 @@
+import pandas as pd
+
+from conftest import write_export
+from soccer_tickets.raw_data_reader import LEAD_TIME_WINDOWS, Reader
+from soccer_tickets.sales_cube import SalesCube
+
+
+def test_refresh_adds_only_the_new_rows(sales_files, tmp_path, monkeypatch):
+    sales23, sales24 = sales_files
+    dataset = str(tmp_path / 'sales')
+    export = write_export(str(tmp_path / '2024_Sales_as_of_Oct03.csv'), sales24, 0.9)
+    options = {'dataset': dataset, 'workers': 1, 'lead_time_windows': LEAD_TIME_WINDOWS}
+    cube = SalesCube.from_reader(Reader(sales23, export, **options))
+
+    updated = Reader(sales23, write_export(export, sales24), **options)
+    assert updated.new_rows > 0
+
+    def rebuild(reader):
+        raise AssertionError("refresh rebuilt the cube instead of adding the new rows")
+
+    monkeypatch.setattr(cube, '_rebuild', rebuild)
+    cube.refresh(updated)
+    assert cube.rows == len(updated.total_sales)
+
+    expected = SalesCube.from_reader(updated)
+    for dimension in ['event_name', 'purchase_state', 'days_out_bucket', 'year']:
+        pd.testing.assert_frame_equal(cube.rollup(dimension), expected.rollup(dimension))
+    pd.testing.assert_frame_equal(cube.rollup(), expected.rollup())
+
+
+def test_refresh_rebuilds_when_the_rows_do_not_line_up(sales_files):
+    reader = Reader(*sales_files, workers = 1)
+    cube = SalesCube(reader.total_sales.iloc[:100])
+    cube.refresh(reader)
+    assert cube.rows == len(reader.total_sales)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from soccer_tickets.raw_data_reader import Reader
+
+
+def test_lookup_after_total_sales_is_replaced(sales_files):
+    reader = Reader(*sales_files, workers = 1)
+    event = reader.total_sales['event_name'].iloc[0]
+    assert (reader.query.lookup(event_name = event)['event_name'] == event).all()
+
+    reader.total_sales = reader.total_sales.sample(frac = 1, random_state = 0).reset_index(drop = True)
+    found = reader.query.lookup(event_name = event, days_out = (7, 30))
+    expected = reader.total_sales[(reader.total_sales['event_name'] == event)
+                                  & reader.total_sales['days_out'].between(7, 30)]
+    pd.testing.assert_frame_equal(found, expected)
+
+
+def test_appended_rows_are_added_to_the_indexes(sales_files):
+    reader = Reader(*sales_files, workers = 1)
+    sales = reader.total_sales
+    event = sales['event_name'].iloc[0]
+    first = sales.iloc[:len(sales) // 2]
+    reader.total_sales = first
+    query = reader.query
+    assert len(query.lookup(event_name = event)) == (first['event_name'] == event).sum()
+    indexes = query.indexes['event_name']
+
+    reader.total_sales = sales
+    rows = reader.query.positions(event_name = event)
+    assert reader.query.indexes['event_name'] is indexes
+    np.testing.assert_array_equal(rows, np.flatnonzero(sales['event_name'] == event))
+
+
+def test_lookup_after_total_sales_is_sorted_in_place(sales_files):
+    reader = Reader(*sales_files, workers = 1)
+    event = reader.total_sales['event_name'].iloc[0]
+    reader.query.lookup(event_name = event, days_out = (7, 30))
+
+    reader.total_sales.sort_values('purchase_date', inplace = True, ignore_index = True)
+    found = reader.query.lookup(event_name = event, days_out = (7, 30))
+    expected = reader.total_sales[(reader.total_sales['event_name'] == event)
+                                  & reader.total_sales['days_out'].between(7, 30)]
+    pd.testing.assert_frame_equal(found, expected)
+
+    reader.total_sales['event_name'] = reader.total_sales['event_name'].iloc[::-1].to_numpy()
+    assert (reader.query.lookup(event_name = event)['event_name'] == event).all()
+
+
+def test_reset_after_cell_edits(sales_files):
+    reader = Reader(*sales_files, workers = 1)
+    event = reader.total_sales['event_name'].iloc[0]
+    rows = len(reader.query.lookup(event_name = event))
+    reader.total_sales.loc[reader.total_sales['event_name'] != event, 'event_name'] = event
+    reader.query.reset()
+    assert len(reader.query.lookup(event_name = event)) == len(reader.total_sales) > rows
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from soccer_tickets.raw_data_reader import Reader
+from soccer_tickets.sales_store import read_store, store_partitions, write_store
+
+
+def test_purchase_dates_match_reader(sales_files, tmp_path):
+    sales = Reader(*sales_files, workers = 1).total_sales
+    root = str(tmp_path / 'store')
+    write_store(sales, root)
+    dates = sales['purchase_date'].dropna().sort_values()
+    start, end = dates.iloc[len(dates) // 3].normalize(), dates.iloc[len(dates) // 2].normalize()
+
+    stored = read_store(root, ['purchase_date', 'event_name'], purchase_dates = (start, end))
+    filtered = Reader(*sales_files, workers = 1, purchase_dates = (start, end)).total_sales
+    assert len(stored) == len(filtered) > 0
+    assert stored['purchase_date'].max() < end
+    pd.testing.assert_series_equal(stored['purchase_date'].sort_values(ignore_index = True),
+                                   filtered['purchase_date'].sort_values(ignore_index = True))
+
+
+def test_partition_starting_on_the_end_date_is_skipped(sales_files, tmp_path):
+    sales = Reader(*sales_files, workers = 1).total_sales
+    root = str(tmp_path / 'store')
+    manifest = write_store(sales, root)
+    first = min(pd.Timestamp(partition['stats']['purchase_date'][0]) for partition in manifest['partitions'])
+    assert store_partitions(root, purchase_dates = (None, first)) == []
@@ -0,0 +1,13 @@
+import pandas as pd
+
+from soccer_tickets.raw_data_reader import Reader
+
+
+def test_streamed_chunks_match_the_loaded_sales(sales_files, tmp_path):
+    loaded = Reader(*sales_files, workers = 1).total_sales
+    reader = Reader(*sales_files, workers = 1, chunksize = 3_000)
+    assert reader.total_sales is None
+    chunks = list(reader.iter_sales())
+    assert len(chunks) > len(sales_files)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index = True), loaded)
+    assert reader.write_sales(str(tmp_path / 'sales.csv')) == len(loaded)
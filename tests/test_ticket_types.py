@@ -0,0 +1,9 @@
+from soccer_tickets.raw_data_reader import Reader
+
+
+def test_simpler_ticket_type_matches_the_mapping(sales_files):
+    reader = Reader(*sales_files, workers = 1)
+    sales = reader.total_sales.dropna(subset = ['updated_ticket_type'])
+    simple = sales['updated_ticket_type'].apply(reader.simpler_ticket_type)
+    assert (simple == sales['simple_ticket_type']).all()
+    assert reader.simpler_ticket_type('not a ticket group') == 'other'
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from soccer_tickets.raw_data_reader import STATES, lookup_zip_states
+
+
+def chain_state(zip: int) -> str:
+    """The if/elif chain ZIP_RANGES replaced (Reader._determining_state before the interval
+    lookup), with the state names spelled as they are now."""
+    if zip in range (99501, 99951):
+        return "Alaska"
+    elif zip in range(35004,36926):
+        return "Alabama"
+    elif (zip in range(71601,72960)) or zip == 75502:
+        return "Arkansas"
+    elif zip in range(85001,86557):
+        return "Arizona"
+    elif zip in range(90001,96162):
+        return "California"
+    elif zip in range(80001,81659):
+        return "Colorado"
+    elif (zip in range(6001,6390)) or (zip in range(6401,6929)):
+        return "Connecticut"
+    elif (zip in range(20001,20040)) or (zip in range(20042,20600)) or (zip == 20799):
+        return "District of Columbia"
+    elif zip in range(19701, 19981):
+        return "Delaware"
+    elif zip in range(32004,34998):
+        return "Florida"
+    elif (zip in range(30001,32000)) or (zip == 39901):
+        return "Georgia"
+    elif zip in range(96701,96899):
+        return "Hawaii"
+    elif (zip in range(50001,52809)) or (zip in range(68119, 68121)):
+        return "Iowa"
+    elif zip in range(83201,83877):
+        return "Idaho"
+    elif zip in range(60001,63000):
+        return "Illinois"
+    elif zip in range(46001,47998):
+        return "Indiana"
+    elif zip in range(66002,67955):
+        return "Kansas"
+    elif zip in range(40003,42789):
+        return "Kentucky"
+    elif (zip in range(70001,71233)) or (zip in range(71234,71498)):
+        return "Louisiana"
+    elif (zip in range(1001,2792)) or (zip in range(5501,5545)):
+        return "Massachusetts"
+    elif (zip == 20331) or (zip in range(20335,20798)) or (zip in range(20812,21931)):
+        return "Maryland"
+    elif zip in range(3901,4993):
+        return "Maine"
+    elif zip in range(48001,49972):
+        return "Michigan"
+    elif zip in range(55001,56764):
+        return "Minnesota"
+    elif (zip in range(38601,39777)) or (zip == 71233):
+        return "Mississippi"
+    elif zip in range(59001,59938):
+        return "Montana"
+    elif zip in range(27006,28910):
+        return "North Carolina"
+    elif zip in range(58001,58857):
+        return "North Dakota"
+    elif (zip in range(68001,68119)) or (zip in range(68122, 69368)):
+        return "Nebraska"
+    elif zip in range(3031,3898):
+        return "New Hampshire"
+    elif zip in range(7001,8990):
+        return "New Jersey"
+    elif zip in range(87001,88442):
+        return "New Mexico"
+    elif zip in range(88901,89884):
+        return "Nevada"
+    elif (zip in range(10001,14976)) or (zip == 6390):
+        return "New York"
+    elif zip in range(43001,46000):
+        return "Ohio"
+    elif (zip in range(73001,73200)) or (zip in range(73401,74967)):
+        return "Oklahoma"
+    elif zip in range(97001,97921):
+        return "Oregon"
+    elif zip in range(15001,19641):
+        return "Pennsylvania"
+    elif zip in range(2801,2941):
+        return "Rhode Island"
+    elif zip in range(29001,29949):
+        return "South Carolina"
+    elif zip in range(57001,57800):
+        return "South Dakota"
+    elif zip in range(37010,38590):
+        return "Tennessee"
+    elif (zip in range(75001,75502)) or (zip in range(75503,80000)) or (zip in range(88510,88590)) or (zip == 73301):
+        return "Texas"
+    elif zip in range(84001,84785):
+        return "Utah"
+    elif (zip in range(20040,20042)) or (zip in range(20040, 20168)) or (zip == 20042) or (zip in range(22001,24659)):
+        return "Virginia"
+    elif (zip in range(5001,5495)) or (zip in range(5601,5908)):
+        return "Vermont"
+    elif zip in range(98001,99404):
+        return "Washington"
+    elif zip in range(53001,54991):
+        return "Wisconsin"
+    elif zip in range(24701,26887):
+        return "West Virginia"
+    elif zip in range(82001,83129):
+        return "Wyoming"
+
+
+def _states(zips: pd.Series) -> list:
+    """Looks up the states of zipcodes, with None for no state like the chain."""
+    return [None if pd.isna(state) else state for state in lookup_zip_states(zips)['purchase_state']]
+
+
+def test_intervals_match_the_chain():
+    zips = pd.Series(np.arange(0, 100_001))
+    expected = [chain_state(code) for code in zips]
+    mismatches = [(code, state, want) for code, state, want in zip(zips, _states(zips), expected)
+                  if state != want]
+    assert mismatches == []
+
+
+def test_abbreviations_and_in_or_out():
+    zips = pd.Series([15222, 20041, 20799, None, 99999, 6390], dtype = 'Int64')
+    states = lookup_zip_states(zips)
+    assert _states(zips) == ['Pennsylvania', 'Virginia', 'District of Columbia',
+                                                 None, None, 'New York']
+    assert states['purchase_abbreviations'].tolist() == [STATES['Pennsylvania'], STATES['Virginia'],
+                                                         STATES['District of Columbia'], 'unknown',
+                                                         'unknown', STATES['New York']]
+    assert states['In_or_Out'].tolist() == ['In State', 'Out of State', 'Out of State', 'nan', 'nan',
+                                            'Out of State']